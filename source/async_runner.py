@@ -0,0 +1,179 @@
+# async_runner.py - asyncio-вариант основного цикла бота
+# ---------------------------------------------------------------------
+# Три независимые части:
+#   • _receive_loop  — забирает события longpoll и кладёт их в очередь
+#                      (в callback_server.py — принимает их по HTTP);
+#   • _dispatch_loop — превращает событие в ответ (build_reply);
+#   • _send          — ставит ответ в BatchSender (execute-пачки с лимитом
+#                      запросов/с), одновременно не более `concurrency` ответов.
+# Медленный messages.send одного пользователя больше не задерживает чтение
+# и обработку остальных событий.
+# ---------------------------------------------------------------------
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+import requests
+from vk_api.exceptions import ApiError
+
+from source.config import TOKEN, GROUP_ID, SEND_CONCURRENCY, SEND_RPS, LONGPOLL_STATE_PATH
+from source.dispatch import build_reply, EVENT_DEDUP
+from source.longpoll import LongPollClient
+from source.metrics import QUEUE_DEPTH
+from source.sender import BatchSender
+from source.vk_http import VkHttpClient
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBotRunner:
+    """
+    Асинхронный раннер: longpoll, обработка и отправка идут параллельно.
+    client — объект с методом method(name, values), например VkHttpClient.
+    """
+
+    def __init__(self,
+                 client: VkHttpClient,
+                 group_id: int,
+                 concurrency: int = SEND_CONCURRENCY,
+                 wait: int = 25,
+                 rate: float = SEND_RPS,
+                 state_path: Optional[Path] = None):
+        self.client = client
+        self.group_id = group_id
+        self.state_path = state_path
+        self.concurrency = max(concurrency, 1)
+        self.wait = wait
+        self.rate = rate
+
+        self.sent = 0                      # счётчики — для логов и замеров
+        self.failed = 0
+
+        self._events: Optional[asyncio.Queue] = None
+        self._send_slots: Optional[asyncio.Semaphore] = None
+        self._sender: Optional[BatchSender] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._stopping: Optional[asyncio.Event] = None
+
+    # -----------------------------------------------------------------
+    # Запуск / остановка
+    # -----------------------------------------------------------------
+
+    async def run(self) -> None:
+        """Работает, пока не вызван stop()."""
+        self._events = asyncio.Queue(maxsize=self.concurrency * 4)
+        self._send_slots = asyncio.Semaphore(self.concurrency)
+        self._stopping = asyncio.Event()
+        self._sender = BatchSender(self.client, rate=self.rate).start()
+        QUEUE_DEPTH.set_function(self._events.qsize, "events")
+        QUEUE_DEPTH.set_function(self._sender.qsize, "send")
+        tasks = [
+            asyncio.create_task(self._receive_loop(), name="vk-receive"),
+            asyncio.create_task(self._dispatch_loop(), name="vk-dispatch"),
+        ]
+        for task in tasks:
+            task.add_done_callback(self._task_done)
+        try:
+            await self._stopping.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._in_flight:                            # дожидаемся уже начатых отправок
+                await asyncio.gather(*self._in_flight, return_exceptions=True)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._sender.stop)
+            except RuntimeError:                           # пул потоков уже закрыт: процесс завершается
+                self._sender.stop()
+            logger.info(f"Дедупликация событий: {EVENT_DEDUP.stats()}")
+
+    def stop(self) -> None:
+        """Просит раннер завершиться (вызывать из того же event loop)."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        """Циклы работают до stop(); если какой-то завершился сам — пишем в лог и останавливаемся."""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error("Задача %s упала: %s", task.get_name(), error, exc_info=error)
+        elif not self._stopping.is_set():                  # сама вышла после stop() — это штатно
+            logger.error("Задача %s неожиданно завершилась", task.get_name())
+        self.stop()
+
+    # -----------------------------------------------------------------
+    # Корутины
+    # -----------------------------------------------------------------
+
+    async def _receive_loop(self) -> None:
+        """Источник событий для очереди; по умолчанию — Bots Long Poll."""
+        await self._poll_loop()
+
+    async def _poll_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        longpoll = LongPollClient(self.client, self.group_id, wait=self.wait, state_path=self.state_path)
+        logger.info("LongPoll запущен (async)")
+        while True:
+            try:
+                pending = loop.run_in_executor(None, longpoll.check)
+            except RuntimeError:                          # пул потоков уже закрыт: процесс завершается
+                logger.info("LongPoll остановлен: пул потоков закрыт")
+                self.stop()
+                return
+            try:
+                events = await pending
+            except (requests.RequestException, ApiError, ValueError, KeyError) as e:
+                await asyncio.sleep(longpoll.failure_delay(e))
+                continue
+            except Exception as e:                        # непредвиденное — в лог со стеком, но не падаем
+                logger.exception("Непредвиденная ошибка longpoll: %s", e)
+                await asyncio.sleep(longpoll.failure_delay(e))
+                continue
+            longpoll.backoff.reset()
+            for event in events:
+                await self._events.put(event)             # ждём, если обработка не успевает
+            longpoll.save_ts()
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            event = await self._events.get()
+            try:
+                params = build_reply(event)
+            except Exception as e:                         # одно событие не должно останавливать цикл
+                logger.exception("Ошибка при обработке события: %s", e)
+                continue
+            if params is None:
+                continue
+            await self._send_slots.acquire()               # лимит одновременных отправок
+            task = asyncio.create_task(self._send(params))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, params: Dict[str, Any]) -> None:
+        try:
+            await asyncio.wrap_future(self._sender.submit(params))
+            self.sent += 1
+            logger.info(
+                "Бот ответил пользователю %s: '%.60s'", params["peer_id"], params["message"],
+                extra={"category": "reply", "user_id": params["peer_id"]},
+            )
+        except ApiError as e:
+            self.failed += 1
+            logger.error("VK ApiError при отправке: %s", e)
+        except Exception as e:
+            self.failed += 1
+            logger.error("Ошибка при отправке сообщения пользователю %s: %s", params["peer_id"], e)
+        finally:
+            self._send_slots.release()
+
+
+def run_async_bot() -> None:
+    """Точка входа для BOT_RUNNER=async."""
+    logger.info("Запускаем бота VK Education (asyncio, до %s отправок одновременно)…",
+                SEND_CONCURRENCY)
+    client = VkHttpClient(TOKEN)
+    state_path = Path(LONGPOLL_STATE_PATH) if LONGPOLL_STATE_PATH else None
+    asyncio.run(AsyncBotRunner(client, GROUP_ID, state_path=state_path).run())
@@ -0,0 +1,525 @@
+# benchmarks.py - микро-бенчмарки горячих функций бота
+# ---------------------------------------------------------------------
+# Запуск:  python -m source.benchmarks            — все бенчмарки
+#          python -m source.benchmarks faq        — только выбранные
+#          python -m source.benchmarks hot --save-baseline   — запомнить базу
+#          python -m source.benchmarks hot        — сравнить с ней
+# Каждый бенчмарк печатает время одного вызова: среднее, p50 и p99.
+# Все замеры запуска пишутся в JSON (--json), а если есть сохранённая
+# база (--baseline), p50 сравнивается с ней: рост больше --threshold
+# (и больше MIN_DELTA_US) считается регрессией, и код выхода — 1.
+# Замеры горячего пути идут несколькими сериями вперемешку с эталонной
+# нагрузкой, и сравнивается время относительно неё — так результат не
+# зависит от того, насколько занята машина в момент запуска.
+# ---------------------------------------------------------------------
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+RESULTS: Dict[str, Dict[str, float]] = {}       # имя замера → статистика, для JSON и сравнения
+
+BASELINE_PATH = Path(__file__).resolve().parent.parent / "data" / "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.5                      # +50% к p50 (после поправки на скорость машины)
+MIN_DELTA_US = 20.0                             # …и не меньше 20 µs: вызовы в единицы µs — шум
+REFERENCE_ROUNDS = 10                           # вызовов эталонной нагрузки до и после серии
+
+
+def benchmark(name: str):
+    """Регистрирует функцию как бенчмарк с именем name."""
+    def register(fn: Callable[[], None]) -> Callable[[], None]:
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _series(fn: Callable[..., Any],
+            inputs: List[Any],
+            rounds: int,
+            setup: Optional[Callable[[], None]] = None) -> List[float]:
+    """Отсортированные времена rounds × len(inputs) вызовов, µs."""
+    series: List[float] = []
+    clock = time.perf_counter
+    for _ in range(rounds):
+        for x in inputs:
+            if setup is not None:
+                setup()
+            start = clock()
+            fn(x)
+            series.append((clock() - start) * 1e6)
+    series.sort()
+    return series
+
+
+def measure(fn: Callable[..., Any],
+            inputs: List[Any],
+            rounds: int = 5,
+            repeats: int = 1,
+            setup: Optional[Callable[[], None]] = None,
+            reference: Optional[Callable[[Any], None]] = None) -> Dict[str, float]:
+    """
+    Вызывает fn(x) для каждого x из inputs `rounds` раз; всё это — `repeats`
+    серий. Возвращает статистику одного вызова в микросекундах; p50 — лучшая
+    из медиан серий (случайные помехи только замедляют, поэтому минимум
+    устойчивее). setup() вызывается перед каждым вызовом вне замера.
+    reference — эталонная нагрузка, замеряемая до и после каждой серии:
+    relative = медиана серии / медиана эталона не зависит от того, насколько
+    быстра машина именно в эту секунду. Сборщик мусора выключен, как в timeit.
+    """
+    timings: List[float] = []
+    medians: List[float] = []
+    relative: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            ref_before = _series(reference, [None], REFERENCE_ROUNDS) if reference else None
+            series = _series(fn, inputs, rounds, setup)
+            median = series[len(series) // 2]
+            if reference:
+                ref_after = _series(reference, [None], REFERENCE_ROUNDS)
+                ref = (ref_before[len(ref_before) // 2] + ref_after[len(ref_after) // 2]) / 2
+                relative.append(median / ref)
+            medians.append(median)
+            timings += series
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    timings.sort()
+    stats = {
+        "mean_us": statistics.fmean(timings),
+        "p50_us": min(medians),
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        "calls": len(timings),
+    }
+    if relative:
+        stats["relative"] = statistics.median(relative)
+    return stats
+
+
+def report(name: str, stats: Dict[str, float]) -> None:
+    RESULTS[name] = stats
+    print(f"{name:<40} mean {stats['mean_us']:9.1f} µs   "
+          f"p50 {stats['p50_us']:9.1f} µs   p99 {stats['p99_us']:9.1f} µs")
+
+
+# ---------------------------------------------------------------------
+# FAQ
+# ---------------------------------------------------------------------
+
+FAQ_MESSAGES = [
+    "какие сроки у проектов",
+    "дадут ли сертификат за участие",
+    "кто может участвовать в программе",
+    "можно выбрать две задачи сразу",
+    "где посмотреть вебинары",
+    "привет как дела",
+    "хочу проект по дизайну мобильного приложения",
+    "что делать если я не нашел подходящую задачу",
+]
+
+
+def _synthetic_faq(questions: List[str], size: int) -> List[str]:
+    """Раздувает список вопросов до size за счёт перестановок и вставок слов."""
+    rnd = random.Random(42)
+    fillers = ["пожалуйста", "подскажите", "студентам", "в этом году", "по проектам", "вообще", "точно"]
+    result = list(questions)
+    while len(result) < size:
+        words = rnd.choice(questions).rstrip("?").split()
+        rnd.shuffle(words)
+        words.insert(rnd.randrange(len(words) + 1), rnd.choice(fillers))
+        result.append(" ".join(words) + "?")
+    return result
+
+
+@benchmark("faq")
+def bench_faq() -> None:
+    from source.bot_logic import KNOWLEDGE
+    from source.faq_matcher import FaqMatcher
+
+    questions = [item["question"] for item in KNOWLEDGE.current.faq_list]
+    for size in (len(questions), 300, 1000):
+        matcher = FaqMatcher(_synthetic_faq(questions, size))
+        report(f"FaqMatcher.match ({size} вопросов)", measure(matcher.match, FAQ_MESSAGES, rounds=50))
+
+
+# ---------------------------------------------------------------------
+# Проверка на мат
+# ---------------------------------------------------------------------
+
+_CLEAN_WORDS = ("привет", "подскажите", "какие", "проекты", "есть", "по", "разработке",
+                "мобильных", "приложений", "и", "анализу", "данных", "для", "студентов")
+
+
+def _long_message(length: int, dirty: str | None = None) -> str:
+    """Осмысленный по составу текст длиной ~length; dirty — слово в самом конце."""
+    rnd = random.Random(length)
+    words: List[str] = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rnd.choice(_CLEAN_WORDS))
+    if dirty:
+        words[-1] = dirty
+    return " ".join(words)
+
+
+@benchmark("profanity")
+def bench_profanity() -> None:
+    import re
+    import tempfile
+    from pathlib import Path
+    from source.bot_data import BAD_WORDS_FILE_PATH
+    from source.profanity import load_or_build
+
+    word_re = re.compile(r"[А-Яа-яЁёA-Za-z\-]+")
+    bad_words = {w.strip().lower() for w in BAD_WORDS_FILE_PATH.read_text(encoding="utf-8").splitlines()}
+
+    def token_set_check(text: str) -> bool:              # прежняя реализация, для сравнения
+        return any(w.lower() in bad_words for w in word_re.findall(text))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = Path(tmp) / "automaton.pickle"
+        for label in ("сборка автомата", "загрузка из pickle"):
+            start = time.perf_counter()
+            matcher = load_or_build(BAD_WORDS_FILE_PATH, artifact)
+            print(f"{'ProfanityMatcher: ' + label:<40} {(time.perf_counter() - start) * 1e3:9.1f} ms, "
+                  f"{len(matcher.goto)} состояний")
+
+    for length in (100, 1_000, 10_000):
+        clean = [_long_message(length)]
+        dirty = [_long_message(length, dirty="пuзд@тый")]  # замаскированный корень в конце
+        report(f"старая проверка, {length} симв.", measure(token_set_check, clean, rounds=50))
+        report(f"автомат, {length} симв., чисто", measure(matcher.contains, clean, rounds=50))
+        report(f"автомат, {length} симв., мат в конце", measure(matcher.contains, dirty, rounds=50))
+
+
+# ---------------------------------------------------------------------
+# Предобработка сообщения
+# ---------------------------------------------------------------------
+
+
+@benchmark("preprocess")
+def bench_preprocess() -> None:
+    from source import profanity
+    from source.preprocess import normalize, preprocess, shorten_query
+    from source.search import tokenize
+
+    def separate_passes(text: str) -> None:              # как этапы разбирали текст раньше
+        normalize(text)                                  # приветствие
+        profanity.normalize(text)                        # мат
+        tokenize(text)                                   # FAQ
+        shorten_query(normalize(text))                   # запрос для кнопок поиска
+
+    messages = FAQ_MESSAGES + ["ghbdtn", "Ghjtrns gj lbpfqye"]
+    report("отдельный разбор на каждом этапе", measure(separate_passes, messages, rounds=1000))
+    report("preprocess (один проход)", measure(preprocess, messages, rounds=1000))
+    long = [_long_message(1_000)]
+    report("отдельный разбор, 1000 симв.", measure(separate_passes, long, rounds=200))
+    report("preprocess, 1000 симв.", measure(preprocess, long, rounds=200))
+
+
+# ---------------------------------------------------------------------
+# Хранилище проектов
+# ---------------------------------------------------------------------
+
+
+def _synthetic_projects(projects: List[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    """Копии реальных проектов с уникальными названиями."""
+    return [dict(projects[i % len(projects)], title=f"{projects[i % len(projects)]['title']} #{i}")
+            for i in range(size)]
+
+
+def _allocated_kb(build: Callable[[], Any]) -> float:
+    import tracemalloc
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del obj
+    return size / 1024
+
+
+@benchmark("projects")
+def bench_projects() -> None:
+    import json
+    from source.bot_logic import KB_PATH
+    from source.project_store import ProjectStore
+
+    base = json.loads(KB_PATH.read_text(encoding="utf-8"))["available_projects"]
+    for size in (len(base), 10_000):
+        raw = _synthetic_projects(base, size)
+        store = ProjectStore(raw)
+        # память — с разбора JSON, как при загрузке базы: у dict-ов свои копии
+        # всех строк, у хранилища направления/длительности общие
+        text = json.dumps(raw, ensure_ascii=False)
+        dict_kb = _allocated_kb(lambda: json.loads(text))
+        store_kb = _allocated_kb(lambda: ProjectStore(json.loads(text)))
+        print(f"{'память: список dict / ProjectStore':<40} {dict_kb:9.1f} KiB / {store_kb:.1f} KiB ({size} проектов)")
+
+        titles = [p["title"] for p in raw[::max(1, size // 50)]]
+        ids = [store.find_by_title(t).id for t in titles]
+        direction = raw[0]["direction"]
+        report(f"поиск по названию перебором ({size})",
+               measure(lambda t: next(p for p in raw if p["title"] == t), titles, rounds=5))
+        report(f"ProjectStore.find_by_title ({size})", measure(store.find_by_title, titles, rounds=50))
+        report(f"ProjectStore.get по ID ({size})", measure(store.get, ids, rounds=50))
+        report(f"фильтр по направлению перебором ({size})",
+               measure(lambda d: [p for p in raw if p["direction"] == d], [direction], rounds=20))
+        report(f"ProjectStore.filter ({size})", measure(store.filter, [direction], rounds=20))
+
+
+# ---------------------------------------------------------------------
+# Размер клавиатур: старый и компактный payload
+# ---------------------------------------------------------------------
+
+
+def _menu_keyboards() -> List[tuple]:
+    """(название меню, JSON клавиатуры) для всех видов экранов бота."""
+    from source import bot_logic as bl
+    from source import keyboards as kb
+
+    snap = bl.KNOWLEDGE.current
+    menus = [
+        ("главное меню", kb.kb_main_menu()),
+        ("«Посмотреть проекты»", kb.kb_find_menu(depth=1)),
+        ("выбор направления", kb.kb_directions_menu(snap.directions, depth=2)),
+        ("выбор длительности", kb.kb_durations_menu(snap.durations, depth=2)),
+    ]
+    for page in range((len(snap.faq_list) + bl.PAGE_SIZE - 1) // bl.PAGE_SIZE):
+        menus.append((f"FAQ, стр. {page + 1}", kb.kb_faq_page(snap.faq_list, page, bl.PAGE_SIZE, depth=1)))
+    menus.append(("все проекты, стр. 1", kb.kb_projects_page(snap.projects, 0, bl.PAGE_SIZE, depth=3)))
+    for item in snap.directions:
+        subset = snap.store.filter(direction=item["value"])
+        menus.append((f"направление «{item['value']}»",
+                      kb.kb_projects_page(subset, 0, bl.PAGE_SIZE, depth=3, extra_filter={"direction": item["value"]})))
+    for item in snap.durations:
+        subset = snap.store.filter(duration=item["value"])
+        menus.append((f"длительность «{item['value']}»",
+                      kb.kb_projects_page(subset, 0, bl.PAGE_SIZE, depth=3, extra_filter={"duration": item["value"]})))
+    hits = snap.search_index.search("данные", limit=bl.SEARCH_LIMIT)
+    menus.append(("поиск «данные»", kb.kb_projects_page(hits, 0, bl.PAGE_SIZE, depth=3,
+                                                       extra_filter={"q": "данные"}, page_cmd="search_page")))
+    longest = max(snap.projects, key=lambda p: len(p.title))
+    card = bl.generate_keyboard_response(1, "", {"cmd": "project_details", "depth": 3, "data": {
+        "title": longest.title, "direction": longest.direction, "page": 0}})[1]
+    menus.append(("карточка проекта", card))
+    return menus
+
+
+def _payload_bytes(keyboard: str) -> int:
+    import json
+    return max(len(btn["action"]["payload"].encode("utf-8"))
+               for row in json.loads(keyboard)["buttons"] for btn in row)
+
+
+@benchmark("keyboards")
+def bench_keyboards() -> None:
+    from source import payload
+
+    sizes = {}
+    for compact in (False, True):
+        payload.COMPACT_PAYLOADS = compact
+        sizes[compact] = _menu_keyboards()
+    payload.COMPACT_PAYLOADS = True
+
+    print(f"{'меню':<42} {'клавиатура, байт':>22}   {'макс. payload, байт':>20}")
+    total_old = total_new = 0
+    for (name, old), (_, new) in zip(sizes[False], sizes[True]):
+        old_len, new_len = len(old.encode("utf-8")), len(new.encode("utf-8"))
+        total_old += old_len
+        total_new += new_len
+        print(f"{name[:42]:<42} {old_len:>9} → {new_len:<9} {_payload_bytes(old):>9} → {_payload_bytes(new)}")
+    print(f"{'итого':<42} {total_old:>9} → {total_new:<9}")
+
+
+# ---------------------------------------------------------------------
+# Горячий путь: функции, которые выполняются на каждое сообщение
+# ---------------------------------------------------------------------
+
+HOT_SIZES = (None, 10_000)      # None — настоящие data/*.json, число — синтетическая база
+HOT_REPEATS = 5                 # серий на замер; в результат идёт лучшая медиана
+
+
+def _synthetic_snapshot(size: int):
+    """Снимок с size проектами (копии настоящих) и настоящим FAQ."""
+    from source.bot_logic import FAQ_PATH, KB_PATH
+    from source.knowledge import KnowledgeSnapshot
+
+    kb = json.loads(KB_PATH.read_text(encoding="utf-8"))
+    kb["available_projects"] = _synthetic_projects(kb["available_projects"], size)
+    return KnowledgeSnapshot(json.dumps(kb, ensure_ascii=False).encode("utf-8"), FAQ_PATH.read_bytes())
+
+
+def _command_payloads(snap) -> Dict[str, dict]:
+    """По одному payload-у на каждую команду — как их отдаёт decode_payload."""
+    from source.bot_logic import PAGE_SIZE
+
+    direction = snap.directions[0]["value"]
+    duration = snap.durations[0]["value"]
+    last_page = max(0, (len(snap.projects) - 1) // PAGE_SIZE)
+    project = snap.projects[len(snap.projects) // 2]
+    return {
+        "go_home": {"cmd": "go_home", "depth": 0},
+        "go_back": {"cmd": "go_back", "depth": 3, "data": {"direction": direction, "page": 1}},
+        "menu_find": {"cmd": "menu_find", "depth": 0},
+        "menu_faq": {"cmd": "menu_faq", "depth": 0},
+        "menu_help": {"cmd": "menu_help", "depth": 0},
+        "faq_page": {"cmd": "faq_page", "depth": 1, "data": {"page": 1}},
+        "faq_answer": {"cmd": "faq_answer", "depth": 1, "data": {"id": 0}},
+        "find_all_projects": {"cmd": "find_all_projects", "depth": 1, "data": {"page": last_page}},
+        "find_by_direction": {"cmd": "find_by_direction", "depth": 1},
+        "find_by_duration": {"cmd": "find_by_duration", "depth": 1},
+        "direction_selected": {"cmd": "direction_selected", "depth": 2, "data": {"value": direction}},
+        "duration_selected": {"cmd": "duration_selected", "depth": 2, "data": {"value": duration}},
+        "projects_page": {"cmd": "projects_page", "depth": 3, "data": {"direction": direction, "page": 1}},
+        "search_page": {"cmd": "search_page", "depth": 3, "data": {"q": "данные", "page": 1}},
+        "project_details": {"cmd": "project_details", "depth": 3, "data": {"id": project.id, "page": 0}},
+    }
+
+
+def reference_workload(_: Any) -> None:
+    """Код бота не вызывает: JSON, сортировка и строки — та же смесь, что в ответе."""
+    rows = [[{"action": {"type": "text", "label": f"Кнопка {i}-{j}", "payload": f'{{"c":[1,"pp",3,{i}]}}'}}
+             for j in range(2)] for i in range(6)]
+    json.dumps({"buttons": rows, "one_time": False}, ensure_ascii=False)
+    sorted(f"проект {i % 37} {i}" for i in range(200))
+    " ".join(word.lower() for word in _CLEAN_WORDS * 4).split()
+
+
+@benchmark("hot")
+def bench_hot_path() -> None:
+    from source import bot_logic as bl
+    from source import keyboards as kb
+    from source.bot_data import contains_bad_words
+    from source.payload import CMD_CODES
+    from source.preprocess import normalize
+
+    def hot(fn: Callable[..., Any], inputs: List[Any], rounds: int,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+        return measure(fn, inputs, rounds=rounds, repeats=HOT_REPEATS, setup=setup,
+                       reference=reference_workload)
+
+    real = bl.KNOWLEDGE.current
+    texts = FAQ_MESSAGES + ["Привет", "ghbdtn", "ты блять", _long_message(300)]
+    report("normalize", hot(normalize, texts, rounds=100))
+    report("contains_bad_words", hot(contains_bad_words, texts, rounds=100))
+    report("kb_main_menu", hot(lambda _: kb.kb_main_menu(), [None], rounds=100))
+    report("kb_find_menu", hot(kb.kb_find_menu, [1], rounds=100))
+
+    try:
+        for size in HOT_SIZES:
+            snap = real if size is None else _synthetic_snapshot(size)
+            bl.KNOWLEDGE.publish(snap)                   # generate_keyboard_response берёт этот снимок
+            tag = f"({len(snap.projects)})"
+            direction = snap.directions[0]["value"]
+            subset = bl.filter_projects(snap, direction)
+            pages = list(range(0, max(1, len(subset) // bl.PAGE_SIZE), max(1, len(subset) // bl.PAGE_SIZE // 10)))
+
+            report(f"filter_projects {tag}", hot(lambda d: bl.filter_projects(snap, d),
+                                                 [d["value"] for d in snap.directions], rounds=20))
+            report(f"list_projects_short {tag}", hot(lambda p: bl.list_projects_short(subset, p), pages, rounds=20))
+            report(f"format_project_card {tag}", hot(bl.format_project_card, snap.projects[:50], rounds=4))
+            report(f"kb_faq_page {tag}", hot(lambda p: kb.kb_faq_page(snap.faq_list, p, bl.PAGE_SIZE, depth=1),
+                                             [0, 1], rounds=40))
+            report(f"kb_directions_menu {tag}", hot(lambda _: kb.kb_directions_menu(snap.directions, depth=2),
+                                                    [None], rounds=40))
+            report(f"kb_durations_menu {tag}", hot(lambda _: kb.kb_durations_menu(snap.durations, depth=2),
+                                                   [None], rounds=40))
+            report(f"kb_projects_page {tag}", hot(
+                lambda p: kb.kb_projects_page(subset, p, bl.PAGE_SIZE, depth=3, extra_filter={"direction": direction}),
+                pages, rounds=10))
+
+            # Списки и поиск кэшируются (LRU по снимку): «из кэша» — повторное
+            # нажатие той же кнопки, «без кэша» — вся работа по сообщению
+            def drop_caches() -> None:
+                bl._drop_stale_caches(snap)
+
+            payloads = _command_payloads(snap)
+            assert set(payloads) == set(CMD_CODES), "бенчмарк должен покрывать все команды"
+            cases = [(cmd, "", pl) for cmd, pl in payloads.items()]
+            cases += [("text:greeting", "Привет", None), ("text:faq", FAQ_MESSAGES[0], None),
+                      ("text:search", "мобильное приложение", None), ("text:profanity", "ты блять", None),
+                      ("text:fallback", "абракадабра", None)]
+            for label, text, pl in cases:
+                call = lambda _, t=text, p=pl: bl.generate_keyboard_response(1, t, p)
+                report(f"generate_keyboard_response {label} из кэша {tag}", hot(call, [None], rounds=40))
+                report(f"generate_keyboard_response {label} без кэша {tag}",
+                       hot(call, [None], rounds=20, setup=drop_caches))
+    finally:
+        bl.KNOWLEDGE.publish(real)
+
+
+# ---------------------------------------------------------------------
+# Результаты: JSON и сравнение с базой
+# ---------------------------------------------------------------------
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Имена замеров, у которых p50 вырос больше чем на threshold и на MIN_DELTA_US.
+    Если у замера есть relative (время относительно эталонной нагрузки),
+    сравнивается оно: машина, которая сейчас медленнее (частота, соседи по
+    хосту), регрессией не считается. «Сейчас» — p50 базы × это отношение.
+    """
+    regressions = []
+    print(f"\n{'сравнение с базой (p50)':<60} {'база':>10} {'сейчас':>10}")
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if not old or not old.get("p50_us"):
+            continue
+        if stats.get("relative") and old.get("relative"):
+            ratio = stats["relative"] / old["relative"]
+        else:
+            ratio = stats["p50_us"] / old["p50_us"]
+        current = old["p50_us"] * ratio
+        mark = ""
+        if ratio > 1 + threshold and current - old["p50_us"] > MIN_DELTA_US:
+            regressions.append(name)
+            mark = "  ← регрессия"
+        elif ratio < 1 - threshold:
+            mark = "  ускорение"
+        print(f"{name[:60]:<60} {old['p50_us']:>8.1f}µs {current:>8.1f}µs {ratio:6.2f}×{mark}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Микро-бенчмарки горячих функций бота")
+    parser.add_argument("names", nargs="*", help=f"какие бенчмарки запускать: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--json", type=Path, help="записать результаты запуска в JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="файл базы для сравнения")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как новую базу")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="допустимый рост p50 (0.25 — на 25%%)")
+    args = parser.parse_args()
+
+    for bench_name in args.names or list(BENCHMARKS):
+        if bench_name not in BENCHMARKS:
+            sys.exit(f"Неизвестный бенчмарк: {bench_name}. Есть: {', '.join(BENCHMARKS)}")
+        BENCHMARKS[bench_name]()
+
+    document = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": RESULTS,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(document, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(document, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nБаза сохранена: {args.baseline} ({len(RESULTS)} замеров)")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        regressions = compare(RESULTS, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегрессий: {len(regressions)}")
+            sys.exit(1)
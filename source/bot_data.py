@@ -1,25 +1,35 @@
 # bot_data.py
-import re
+import threading
 from pathlib import Path
+from typing import Optional
+
+from source.profanity import ProfanityMatcher, load_or_build
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # корень проекта
 BAD_WORDS_FILE_PATH = BASE_DIR / "data" / "Bad_Words_List.txt"
-BAD_WORDS = {
-    w.strip().lower()
-    for w in BAD_WORDS_FILE_PATH.read_text(encoding="utf-8").splitlines()
-    if w.strip()
-}
+BAD_WORDS_AUTOMATON_PATH = BASE_DIR / "data" / "bad_words.automaton.pickle"  # собирается сам
+
+_bad_words_matcher: Optional[ProfanityMatcher] = None
+_bad_words_lock = threading.Lock()
+
 
-_WORD_RE = re.compile(r"[А-Яа-яЁёA-Za-z\-]+")
+def bad_words_matcher() -> ProfanityMatcher:
+    """Автомат загружается (или собирается) при первом обращении, а не при импорте."""
+    global _bad_words_matcher
+    if _bad_words_matcher is None:
+        with _bad_words_lock:
+            if _bad_words_matcher is None:
+                _bad_words_matcher = load_or_build(BAD_WORDS_FILE_PATH, BAD_WORDS_AUTOMATON_PATH)
+    return _bad_words_matcher
 
 
 def contains_bad_words(text: str) -> bool:
     """
-    True, если в тексте встречается слово из BAD_WORDS.
-    Работает O(n) по количеству токенов.
+    True, если в тексте встречается слово из Bad_Words_List.txt или запрещённый корень,
+    в том числе замаскированный («xyй», «пuздец», «бляяя»).
+    Один проход автомата: O(длина текста).
     """
-    tokens = (w.lower() for w in _WORD_RE.findall(text))
-    return any(tok in BAD_WORDS for tok in tokens)
+    return bad_words_matcher().contains(text)
 
 
 VK_EDUCATION_URL = "https://education.vk.company/"
@@ -1,27 +1,34 @@
 # bot_logic.py - Мозг - разбирает сообщения / payload и формирует (text, keyboard)
 # ---------------------------------------------------------------------
 import json
-import re
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, Optional, List, Dict, Any
+from typing import Tuple, Optional, List, Dict, Any, Sequence
 
 from source.keyboards import (  # готовые фабрики клавиатур
-    kb_main_menu,
-    kb_find_menu,
     kb_faq_page,
-    kb_directions_menu,
-    kb_durations_menu,
     kb_projects_page,
     make_btn,
+    KeyboardCache,
+    StaticKeyboards,
     SECONDARY,
     NEGATIVE
 )
 
+from source.knowledge import KnowledgeSnapshot, KnowledgeStore
+from source.project_store import Project
+from source.payload import resolve_facets
+from source.metrics import COMMAND_ERRORS, COMMAND_SECONDS
+from source.router import CommandRouter, Field, PayloadError
+from source.preprocess import preprocess, Preprocessed
+from source.search import tokenize
+
 from source.bot_data import (
     DEFAULT_FALLBACK_MESSAGE,
     CONTACTS_TEXT,
     BAD_WORDS_WARNING,
-    contains_bad_words,
+    bad_words_matcher,
     WELCOME_MESSAGE_AFTER_START
 )
 
@@ -33,41 +40,34 @@ DATA_DIR = ROOT.parent / "data"               # …/Data
 KB_PATH = DATA_DIR / "knowledge_base.json"
 FAQ_PATH = DATA_DIR / "faq.json"
 
-with KB_PATH.open(encoding="utf-8") as f:
-    KB_RAW = json.load(f)
-
-PROJECTS: List[Dict[str, Any]] = KB_RAW["available_projects"]
-FILTERS = KB_RAW["available_filters"]
-DIRECTIONS = FILTERS["directions"]
-DURATIONS = FILTERS["durations"]
-
 PAGE_SIZE = 5  # сколько проектов на одну страницу
 
-with FAQ_PATH.open(encoding="utf-8") as f:
-    _faq_list = json.load(f)["available_answered_questions"]
+FAQ_MATCH_THRESHOLD = 75  # минимальная похожесть текста на вопрос FAQ (0..100)
+
+# Текущий снимок данных. Каждое сообщение обрабатывается целиком на одном
+# снимке (KNOWLEDGE.current берётся один раз), фоновое обновление
+# (KNOWLEDGE.refresh) подменяет снимок, не останавливая обработку.
+KNOWLEDGE = KnowledgeStore(KB_PATH, FAQ_PATH, faq_threshold=FAQ_MATCH_THRESHOLD)
 
-FAQ_LIST: List[dict] = _faq_list  # упорядоченный список
-FAQ_BY_ID: Dict[int, str] = {i: item["answer"] for i, item in enumerate(FAQ_LIST)}
+KEYBOARDS = KeyboardCache()  # статические меню, собранные под версию снимка
 
 # ---------------------------------------------------------------------
 # 2. Утилиты
 # ---------------------------------------------------------------------
 
 
-def normalize(text: str) -> str:
-    """Приводим строку к нижнему регистру и убираем лишние символы"""
-    text = text.lower()
-    text = re.sub(r"[^\w\sа-яё\-]", " ", text)  # всё, кроме букв/цифр/дефиса → пробел
-    return re.sub(r"\s{2,}", " ", text).strip()
+def static_kb(snap: KnowledgeSnapshot) -> StaticKeyboards:
+    """Готовые JSON статических меню для версии снимка"""
+    return KEYBOARDS.get(snap.version, snap.directions, snap.durations)
 
 
-# def match_faq(text: str) -> Optional[str]:
-#     """Ищем точное вхождение вопроса из FAQ"""
-#     lt = normalize(text)
-#     for q, answer in FAQ_BY_ID.items():
-#         if q in lt:
-#             return answer
-#     return None
+def match_faq(snap: KnowledgeSnapshot, terms: Sequence[str]) -> Optional[str]:
+    """Ищем вопрос FAQ, похожий на текст (его термины), и возвращаем вопрос + ответ"""
+    found = snap.faq_matcher.match_terms(terms)
+    if found is None:
+        return None
+    idx, _ = found
+    return f"{snap.faq_list[idx]['question']}\n\n{snap.faq_by_id[idx]}"
 
 
 # ---------------------------------------------------------------------
@@ -75,7 +75,7 @@ def normalize(text: str) -> str:
 # ---------------------------------------------------------------------
 
 
-def list_projects_short(items: List[Dict[str, Any]], page: int) -> str:
+def list_projects_short(items: Sequence[Project], page: int) -> str:
     """
     Возвращает компактный текст-список проектов, которые попали
     на запрошенную страницу пагинации.
@@ -91,15 +91,11 @@ def list_projects_short(items: List[Dict[str, Any]], page: int) -> str:
     return "\n".join(lines)
 
 
-def filter_projects(direction: str | None = None,
-                    duration: str | None = None) -> List[Dict[str, Any]]:
-    """Фильтрация по направлению и/или длительности"""
-    res = PROJECTS
-    if direction:
-        res = [p for p in res if p["direction"] == direction]
-    if duration:
-        res = [p for p in res if p["duration"] == duration]
-    return res
+def filter_projects(snap: KnowledgeSnapshot,
+                    direction: str | None = None,
+                    duration: str | None = None) -> Sequence[Project]:
+    """Фильтрация по направлению и/или длительности (готовые списки ID из хранилища)"""
+    return snap.store.filter(direction, duration)
 
 
 def paginate(items: List[Any], page: int) -> List[Any]:
@@ -107,7 +103,78 @@ def paginate(items: List[Any], page: int) -> List[Any]:
     return items[start:start + PAGE_SIZE]
 
 
-def format_project_card(p: Dict[str, Any]) -> str:
+# Готовые (текст списка, клавиатура) для страниц с фильтрами. Ключ включает
+# сам снимок (сравнивается по identity), поэтому записи разных версий
+# данных не смешиваются; при подмене снимка кэш очищается.
+LISTING_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=LISTING_CACHE_SIZE)
+def _cached_listing(snap: KnowledgeSnapshot,
+                    direction: str | None,
+                    duration: str | None,
+                    page: int,
+                    depth: int,
+                    filter_items: Tuple[Tuple[str, Any], ...]) -> Tuple[str, str]:
+    subset = filter_projects(snap, direction, duration)
+    listing = list_projects_short(subset, page)
+    kb = kb_projects_page(subset, page, PAGE_SIZE, depth=depth, extra_filter=dict(filter_items))
+    return listing, kb
+
+
+def projects_listing(snap: KnowledgeSnapshot,
+                     direction: str | None,
+                     duration: str | None,
+                     page: int,
+                     depth: int,
+                     extra_filter: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Текст страницы списка проектов и её клавиатура. extra_filter уходит в
+    payload кнопок как есть (порядок ключей сохраняется).
+    """
+    return _cached_listing(snap, direction, duration, page, depth,
+                           tuple(extra_filter.items()))
+
+
+# ---------------------------------------------------------------------
+# Полнотекстовый поиск по проектам
+# ---------------------------------------------------------------------
+SEARCH_LIMIT = 20        # сколько лучших результатов показываем
+
+
+@lru_cache(maxsize=256)
+def _cached_search(snap: KnowledgeSnapshot, terms: Tuple[str, ...]) -> Tuple[Project, ...]:
+    return tuple(snap.search_index.search_terms(terms, limit=SEARCH_LIMIT))
+
+
+def search_projects(snap: KnowledgeSnapshot, terms: Tuple[str, ...]) -> List[Project]:
+    """Проекты по убыванию релевантности запросу (его терминам)"""
+    return list(_cached_search(snap, terms))
+
+
+def search_listing(snap: KnowledgeSnapshot,
+                   query: str,
+                   page: int,
+                   depth: int,
+                   terms: Optional[Tuple[str, ...]] = None) -> Tuple[str, str]:
+    """Текст и клавиатура страницы результатов поиска (terms — если запрос уже разобран)"""
+    hits = search_projects(snap, terms if terms is not None else tuple(tokenize(query)))
+    listing = list_projects_short(hits, page)
+    kb = kb_projects_page(hits, page, PAGE_SIZE, depth=depth,
+                          extra_filter={"q": query}, page_cmd="search_page")
+    return listing, kb
+
+
+def _drop_stale_caches(snap: KnowledgeSnapshot) -> None:
+    """Старый снимок больше не нужен — отпускаем его вместе с кэшами."""
+    _cached_listing.cache_clear()
+    _cached_search.cache_clear()
+
+
+KNOWLEDGE.subscribe(_drop_stale_caches)
+
+
+def format_project_card(p: Project) -> str:
     return (
         f"{p['title']}\n"
         f"Направление: {p['direction']}\n"
@@ -122,6 +189,11 @@ def format_project_card(p: Dict[str, Any]) -> str:
 # 4. Главная точка: generate_keyboard_response
 # ---------------------------------------------------------------------
 
+# «не та раскладка» («ghbdtn», «yfxfnm») ловится через Preprocessed.layout;
+# "/start" после нормализации превращается в "start"
+GREET_TRIGGERS = frozenset({"привет", "здравствуй", "начать", "/start", "start", "hi", "старт"})
+
+
 def generate_keyboard_response(
         user_id: int,
         text: str,
@@ -135,205 +207,281 @@ def generate_keyboard_response(
     # --------------------------------------------------------------
     # 0. Если прилетел payload (= пользователь нажал кнопку)
     # --------------------------------------------------------------
+    snap = KNOWLEDGE.current  # один снимок данных на всю обработку сообщения
+
     if payload and isinstance(payload, dict) and payload.get("cmd"):
-        return _handle_command(payload)
+        return COMMANDS.dispatch(payload, snap)  # время и ошибки по командам пишет роутер
+
+    started = time.perf_counter()
+    try:
+        return _handle_text(snap, text)
+    finally:
+        COMMAND_SECONDS.observe(time.perf_counter() - started, "text")
+
+
+def invalid_payload_response() -> Tuple[str, Optional[str]]:
+    """Ответ на payload, который не удалось разобрать (битый JSON, чужой формат)."""
+    COMMAND_ERRORS.inc("other", "invalid")
+    return _main_menu_fallback(KNOWLEDGE.current)
+
+
+def _handle_text(snap: KnowledgeSnapshot, text: str) -> Tuple[str, Optional[str]]:
+    msg = preprocess(text)  # нормализация, термины и раскладка — один раз на сообщение
 
     # --------------------------------------------------------------
-    # 1. Приветственные триггеры
+    # 1. Приветственные триггеры (в т.ч. набранные не в той раскладке)
     # --------------------------------------------------------------
-    greet_triggers = {"привет", "здравствуй", "начать", "/start", "hi", "yfxfnm", "старт", "ghbdtn"}
-    if normalize(text) in greet_triggers:
-        return WELCOME_MESSAGE_AFTER_START, kb_main_menu()
+    if msg.normalized in GREET_TRIGGERS or msg.layout in GREET_TRIGGERS:
+        return WELCOME_MESSAGE_AFTER_START, static_kb(snap).main_menu
 
     # --------------------------------------------------------------
     # 2. Проверка на мат
     # --------------------------------------------------------------
 
-    if contains_bad_words(text):
+    if bad_words_matcher().find_normalized(msg.profanity_text):
         return BAD_WORDS_WARNING, None
 
     # --------------------------------------------------------------
-    # 3. FAQ-поиск
+    # 3. FAQ-поиск и 4. поиск по проектам (название, направление, описание).
+    # Если по тексту ничего нет, а он набран латиницей — пробуем его же
+    # в русской раскладке («ghjtrns» → «проекты»).
     # --------------------------------------------------------------
-    # faq_ans = match_faq(text)
-    # if faq_ans:
-    #     return faq_ans, None
+    variants = [msg]
+    if msg.layout_to_ru:
+        variants.append(preprocess(msg.layout))
+    for variant in variants:
+        answer = _answer_free_text(snap, variant)
+        if answer:
+            return answer
 
     # --------------------------------------------------------------
-    # 4. Простой поиск по проектам по ключевым словам
+    # 5. Фолбэк
     # --------------------------------------------------------------
+    return DEFAULT_FALLBACK_MESSAGE, static_kb(snap).main_menu
 
-    words = normalize(text).split()
-    if words:
-        hits = [p for p in PROJECTS if any(w in p["title"].lower() for w in words)]
-        if hits:
-            first = hits[0]
-            return format_project_card(first), None
 
-    # --------------------------------------------------------------
-    # 5. Фолбэк
-    # --------------------------------------------------------------
-    return DEFAULT_FALLBACK_MESSAGE, kb_main_menu()
+def _answer_free_text(snap: KnowledgeSnapshot, msg: Preprocessed) -> Optional[Tuple[str, Optional[str]]]:
+    """Ответ из FAQ или поиска по проектам; None — если ничего не нашлось"""
+    faq_ans = match_faq(snap, msg.terms)
+    if faq_ans:
+        return faq_ans, None
+
+    if msg.query:
+        hits = search_projects(snap, msg.terms)
+        if len(hits) == 1:
+            return format_project_card(hits[0]), None
+        if hits:
+            listing, kb = search_listing(snap, msg.query, 0, depth=3, terms=msg.terms)
+            return f"Нашёл по запросу «{msg.query}» (стр. 1):\n{listing}", kb
+    return None
 
 
 # ---------------------------------------------------------------------
 # 5. Обработка payload-команд
 # ---------------------------------------------------------------------
+# Обработчик каждой команды зарегистрирован в COMMANDS вместе со схемой
+# полей data (source/router.py): поля уже приведены к типам, отсутствующие
+# заменены значениями по умолчанию. Неизвестная команда и payload, не
+# прошедший схему, получают главное меню.
+
 
+def _main_menu_fallback(snap: KnowledgeSnapshot) -> Tuple[str, Optional[str]]:
+    return DEFAULT_FALLBACK_MESSAGE, static_kb(snap).main_menu
 
-def _handle_command(pl: dict) -> Tuple[str, Optional[str]]:
-    cmd = pl["cmd"]
-    depth = int(pl.get("depth", 0))
-    data = pl.get("data") or {}
-
-    # Главное меню
-    if cmd in {"go_home"}:
-        return "Вы в главном меню. Выберите действие:", kb_main_menu()
-
-    # Шаг назад: bot_logic определит предыдущую клавиатуру по depth-1
-    if cmd in {"go_back"}:
-        # depth уже уменьшен на 1 в кнопке
-        direction = data.get("direction")
-        duration = data.get("duration")
-        page = int(data.get("page", 0))
-
-        # корень
-        if depth <= 0:
-            return "Вы в главном меню. Выберите действие:", kb_main_menu()
-
-        # depth==1 → меню «Как будем искать проекты?»
-        if depth == 1:
-            return "Как будем искать проекты?", kb_find_menu(depth=1)
-
-        # depth==2  → мы были в меню выбора направления/длительности
-        if depth == 2:
-            if direction:
-                return "Выберите направление:", kb_directions_menu(DIRECTIONS, depth=2)
-            if duration:
-                return "Выберите длительность:", kb_durations_menu(DURATIONS, depth=2)
-            # вернулись из «Все проекты»
-            return "Как будем искать проекты?", kb_find_menu(depth=1)
-
-        # depth≥3  → вернуться к списку проектов с теми же фильтрами и страницей
-        subset = filter_projects(direction, duration)
-        listing = list_projects_short(subset, page)
-        msg = f"Список проектов (стр. {page + 1}):\n{listing}"
-        return msg, kb_projects_page(subset, page, PAGE_SIZE, depth=depth,
-                                     extra_filter={k: v for k, v in data.items()
-                                                   if k in {"direction", "duration"}})
-
-    # --- уровень 0 → 1 ---
-    if cmd == "menu_find":
-        return "Как будем искать проекты?", kb_find_menu(depth=1)
-
-    if cmd == "menu_faq":
-        intro = "Выберите вопрос, кликнув по нему 👇"
-        return intro, kb_faq_page(FAQ_LIST, page=0, page_size=PAGE_SIZE, depth=1)
-
-    if cmd == "faq_page":
-        page = int(data.get("page", 0))
-        intro = "Выберите вопрос, кликнув по нему 👇"
-        return intro, kb_faq_page(FAQ_LIST, page=page, page_size=PAGE_SIZE, depth=1)
-
-    if cmd == "menu_help":
-        return CONTACTS_TEXT, kb_main_menu()
-
-    # --- уровень 1 → 2 ---
-    if cmd == "find_all_projects":
-        page = int(data.get("page", 0))
-        listing = list_projects_short(PROJECTS, page)
-        text = f"Список всех проектов (страница {page + 1}):\n{listing}"
-        return text, kb_projects_page(PROJECTS, page, PAGE_SIZE, depth=3, extra_filter={})  # depth=3 иначе
-        # "назад" не работает, костыль
-
-    if cmd == "find_by_direction":
-        return "Выберите направление:", kb_directions_menu(DIRECTIONS, depth=2)
-
-    if cmd == "find_by_duration":
-        return "Выберите длительность:", kb_durations_menu(DURATIONS, depth=2)
-
-    # --- фильтры направления / длительности ---
-    if cmd == "direction_selected":
-        direction = data.get("value")
-        page = int(data.get("page", 0))
-        subset = filter_projects(direction=direction)
-        listing = list_projects_short(subset, page)
-        msg = f"Проекты по направлению «{direction}» (стр. {page + 1}):\n{listing}"
-        return msg, kb_projects_page(subset, page, PAGE_SIZE, depth=3,
-                                     extra_filter={"direction": direction})
-
-    if cmd == "duration_selected":
-        duration = data.get("value")
-        page = int(data.get("page", 0))
-        subset = filter_projects(duration=duration)
-        listing = list_projects_short(subset, page)
-        msg = f"Проекты длительностью «{duration}» (стр. {page + 1}):\n{listing}"
-        return msg, kb_projects_page(subset, page, PAGE_SIZE, depth=3,
-                                     extra_filter={"duration": duration})
-
-    # --- пагинация ---
-    if cmd == "projects_page":
-        page = int(data.get("page", 0))
-        direction = data.get("direction")
-        duration = data.get("duration")
-        subset = filter_projects(direction, duration)
-        listing = list_projects_short(subset, page)
-        text = f"Список проектов (стр. {page + 1}):\n{listing}"
-        return text, kb_projects_page(subset, page, PAGE_SIZE, depth=3,
-                                      extra_filter={"direction": direction,
-                                                    "duration": duration})
-
-    # --- карточка проекта ---
-    if cmd == "project_details":
-        title = data.get("title")
-        page = int(data.get("page", 0))
-        direction = data.get("direction")
-        duration = data.get("duration")
-        proj = next((p for p in PROJECTS if p["title"] == title), None)
-
-        if proj is None:
-            return "Проект не найден 🤷‍♂️", kb_main_menu()
-
-        msg = (
-            f"Проект - {proj['title']}\n\n"
-            f"Направление: {proj['direction']}\n"
-            f"Длительность: {proj['duration']}\n\n"
-            f"{proj['full_description']}\n\n"
-            f"Ссылка: {proj['link_to_project']}"
+
+COMMANDS = CommandRouter(
+    on_unknown=_main_menu_fallback,
+    on_invalid=_main_menu_fallback,
+    prepare=lambda data, snap: resolve_facets(data, snap.facets),  # ID направлений/длительностей → текст
+)
+
+PAGE = Field(int, default=0, minimum=0)
+TEXT = Field(str)
+
+
+# Главное меню
+@COMMANDS.route("go_home")
+def _go_home(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    return "Вы в главном меню. Выберите действие:", static_kb(snap).main_menu
+
+
+# Шаг назад: bot_logic определит предыдущую клавиатуру по depth-1
+@COMMANDS.route("go_back", direction=TEXT, duration=TEXT, q=TEXT, page=PAGE)
+def _go_back(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    # depth уже уменьшен на 1 в кнопке
+    direction = data["direction"]
+    duration = data["duration"]
+    page = data["page"]
+
+    # корень
+    if depth <= 0:
+        return "Вы в главном меню. Выберите действие:", static_kb(snap).main_menu
+
+    # depth==1 → меню «Как будем искать проекты?»
+    if depth == 1:
+        return "Как будем искать проекты?", static_kb(snap).find_menu
+
+    # depth==2  → мы были в меню выбора направления/длительности
+    if depth == 2:
+        if direction:
+            return "Выберите направление:", static_kb(snap).directions_menu
+        if duration:
+            return "Выберите длительность:", static_kb(snap).durations_menu
+        # вернулись из «Все проекты»
+        return "Как будем искать проекты?", static_kb(snap).find_menu
+
+    # depth≥3  → вернуться к списку проектов с теми же фильтрами и страницей
+    if data["q"]:
+        listing, kb = search_listing(snap, data["q"], page, depth=depth)
+        return f"Нашёл по запросу «{data['q']}» (стр. {page + 1}):\n{listing}", kb
+    listing, kb = projects_listing(snap, direction, duration, page, depth=depth,
+                                   extra_filter={k: data[k] for k in ("direction", "duration")
+                                                 if data[k] is not None})
+    msg = f"Список проектов (стр. {page + 1}):\n{listing}"
+    return msg, kb
+
+
+# --- уровень 0 → 1 ---
+@COMMANDS.route("menu_find")
+def _menu_find(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    return "Как будем искать проекты?", static_kb(snap).find_menu
+
+
+@COMMANDS.route("menu_faq")
+def _menu_faq(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    intro = "Выберите вопрос, кликнув по нему 👇"
+    return intro, kb_faq_page(snap.faq_list, page=0, page_size=PAGE_SIZE, depth=1)
+
+
+@COMMANDS.route("faq_page", page=PAGE)
+def _faq_page(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    intro = "Выберите вопрос, кликнув по нему 👇"
+    return intro, kb_faq_page(snap.faq_list, page=data["page"], page_size=PAGE_SIZE, depth=1)
+
+
+@COMMANDS.route("menu_help")
+def _menu_help(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    return CONTACTS_TEXT, static_kb(snap).main_menu
+
+
+@COMMANDS.route("faq_answer", id=Field(int, minimum=0))
+def _faq_answer(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    idx = data["id"]
+    if idx not in snap.faq_by_id:  # кнопка из старой версии FAQ или подделанный payload
+        raise PayloadError(f"id: вопроса {idx} нет, всего {len(snap.faq_list)}")
+    question = snap.faq_list[idx]["question"]
+    msg = f"{question}\n\n{snap.faq_by_id[idx]}"
+    return msg, None  # клавиатура остаётся прежней
+
+
+# --- уровень 1 → 2 ---
+@COMMANDS.route("find_all_projects", page=PAGE)
+def _find_all_projects(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    page = data["page"]
+    listing, kb = projects_listing(snap, None, None, page, depth=3, extra_filter={})  # depth=3 иначе
+    # "назад" не работает, костыль
+    text = f"Список всех проектов (страница {page + 1}):\n{listing}"
+    return text, kb
+
+
+@COMMANDS.route("find_by_direction")
+def _find_by_direction(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    return "Выберите направление:", static_kb(snap).directions_menu
+
+
+@COMMANDS.route("find_by_duration")
+def _find_by_duration(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    return "Выберите длительность:", static_kb(snap).durations_menu
+
+
+# --- фильтры направления / длительности ---
+@COMMANDS.route("direction_selected", value=TEXT, page=PAGE)
+def _direction_selected(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    direction = data["value"]
+    page = data["page"]
+    listing, kb = projects_listing(snap, direction, None, page, depth=3,
+                                   extra_filter={"direction": direction})
+    msg = f"Проекты по направлению «{direction}» (стр. {page + 1}):\n{listing}"
+    return msg, kb
+
+
+@COMMANDS.route("duration_selected", value=TEXT, page=PAGE)
+def _duration_selected(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    duration = data["value"]
+    page = data["page"]
+    listing, kb = projects_listing(snap, None, duration, page, depth=3,
+                                   extra_filter={"duration": duration})
+    msg = f"Проекты длительностью «{duration}» (стр. {page + 1}):\n{listing}"
+    return msg, kb
+
+
+# --- пагинация ---
+@COMMANDS.route("projects_page", direction=TEXT, duration=TEXT, page=PAGE)
+def _projects_page(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    page = data["page"]
+    direction = data["direction"]
+    duration = data["duration"]
+    listing, kb = projects_listing(snap, direction, duration, page, depth=3,
+                                   extra_filter={"direction": direction,
+                                                 "duration": duration})
+    text = f"Список проектов (стр. {page + 1}):\n{listing}"
+    return text, kb
+
+
+# --- результаты поиска ---
+@COMMANDS.route("search_page", q=Field(str, default=""), page=PAGE)
+def _search_page(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    query = data["q"]
+    page = data["page"]
+    listing, kb = search_listing(snap, query, page, depth=3)
+    return f"Нашёл по запросу «{query}» (стр. {page + 1}):\n{listing}", kb
+
+
+# --- карточка проекта ---
+@COMMANDS.route("project_details", id=Field(int, minimum=0), title=TEXT,
+                direction=TEXT, duration=TEXT, q=TEXT, page=PAGE)
+def _project_details(snap: KnowledgeSnapshot, depth: int, data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    page = data["page"]
+    direction = data["direction"]
+    duration = data["duration"]
+    query = data["q"]
+    project_id = data["id"]
+    proj = snap.store.get(project_id) if project_id is not None else snap.store.find_by_title(data["title"])
+
+    if proj is None:
+        return "Проект не найден 🤷‍♂️", static_kb(snap).main_menu
+
+    msg = (
+        f"Проект - {proj['title']}\n\n"
+        f"Направление: {proj['direction']}\n"
+        f"Длительность: {proj['duration']}\n\n"
+        f"{proj['full_description']}\n\n"
+        f"Ссылка: {proj['link_to_project']}"
+    )
+
+    # --------- кнопки «Назад» + «Главное меню» -------------
+    ctx = {
+        "page": page,
+        **({"direction": direction} if direction else {}),
+        **({"duration": duration} if duration else {}),
+        **({"q": query} if query else {})
+    }
+
+    tail = [
+        make_btn(
+            "Назад",
+            cmd="go_back",
+            depth=depth,  # остаёмся на той же глубине, чтобы вернуть к списку проектов!
+            color=NEGATIVE,
+            data=ctx  # весь контекст для восстановления списка
+        ),
+        make_btn(
+            "🏠 Главное меню",
+            cmd="go_home",
+            depth=0,
+            color=SECONDARY
         )
+    ]
 
-        # --------- кнопки «Назад» + «Главное меню» -------------
-        ctx = {
-            "page": page,
-            **({"direction": direction} if direction else {}),
-            **({"duration": duration} if duration else {})
-        }
-
-        tail = [
-            make_btn(
-                "Назад",
-                cmd="go_back",
-                depth=depth,  # остаёмся на той же глубине, чтобы вернуть к списку проектов!
-                color=NEGATIVE,
-                data=ctx  # весь контекст для восстановления списка
-            ),
-            make_btn(
-                "🏠 Главное меню",
-                cmd="go_home",
-                depth=0,
-                color=SECONDARY
-            )
-        ]
-
-        kb = json.dumps({"buttons": [tail], "one_time": False}, ensure_ascii=False)
-        return msg, kb
-
-    if cmd == "faq_answer":
-        idx = int(data.get("id", -1))
-        answer = FAQ_BY_ID.get(idx, DEFAULT_FALLBACK_MESSAGE)
-        question = FAQ_LIST[idx]["question"]
-        msg = f"{question}\n\n{answer}"
-        return msg, None  # клавиатура остаётся прежней
-
-    # неизвестная команда
-    return DEFAULT_FALLBACK_MESSAGE, kb_main_menu()
+    kb = json.dumps({"buttons": [tail], "one_time": False}, ensure_ascii=False)
+    return msg, kb
@@ -0,0 +1,219 @@
+# callback_server.py - приём событий через Callback API вместо longpoll
+# ---------------------------------------------------------------------
+# VK сам присылает каждое событие POST-запросом с JSON. Сервер:
+#   • на {"type": "confirmation"} отвечает кодом подтверждения
+#     (CALLBACK_CONFIRMATION из настроек сообщества);
+#   • сверяет group_id и секретный ключ (CALLBACK_SECRET);
+#   • кладёт событие в ту же очередь, что и longpoll в AsyncBotRunner,
+#     и сразу отвечает "ok" — обработка и отправка идут как обычно.
+# Состояния (ts, сессии longpoll) нет, поэтому за балансировщиком можно
+# держать несколько экземпляров. GET /health — проверка живости.
+# HTTP/1.1 разбирается вручную на asyncio streams, без зависимостей.
+#
+# Локальная проверка: запустить бота с BOT_RUNNER=callback и отправить
+# записанные события:
+#   python -m source.callback_server events.json --url http://127.0.0.1:8080/
+# ---------------------------------------------------------------------
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from source.async_runner import AsyncBotRunner
+from source.config import (TOKEN, GROUP_ID, CALLBACK_CONFIRMATION, CALLBACK_SECRET,
+                           CALLBACK_HOST, CALLBACK_PORT, CALLBACK_PATH)
+from source.longpoll import parse_event
+from source.vk_http import VkHttpClient
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 64 * 1024        # события VK — единицы КБ
+READ_TIMEOUT = 30.0         # сек простоя keep-alive соединения
+_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class CallbackBotRunner(AsyncBotRunner):
+    """AsyncBotRunner, который получает события HTTP-сервером Callback API."""
+
+    def __init__(self,
+                 client: VkHttpClient,
+                 group_id: int,
+                 confirmation: str,
+                 secret: str = "",
+                 host: str = "0.0.0.0",
+                 port: int = 8080,
+                 path: str = "/",
+                 **kwargs):
+        super().__init__(client, group_id, **kwargs)
+        self.confirmation = confirmation
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path
+
+        self.received = 0                  # счётчики запросов
+        self.rejected = 0
+        self.bound_port: Optional[int] = None   # фактический порт (если port=0)
+
+    # -----------------------------------------------------------------
+    # Разбор события
+    # -----------------------------------------------------------------
+
+    async def handle_event(self, body: bytes) -> Tuple[int, str]:
+        """Тело POST-запроса → (HTTP-статус, текст ответа)."""
+        try:
+            data = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return 400, "bad request"
+        if not isinstance(data, dict) or "type" not in data:
+            return 400, "bad request"
+
+        if data.get("group_id") != self.group_id:
+            self.rejected += 1
+            logger.warning(f"Callback: событие для чужого сообщества {data.get('group_id')}")
+            return 403, "forbidden"
+        if data["type"] == "confirmation":
+            logger.info("Callback: запрос подтверждения адреса сервера")
+            return 200, self.confirmation
+        if self.secret and not hmac.compare_digest(str(data.get("secret", "")), self.secret):
+            self.rejected += 1
+            logger.warning("Callback: неверный секретный ключ")
+            return 403, "forbidden"
+
+        self.received += 1
+        try:
+            event = parse_event(data)
+        except (KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Callback: не удалось разобрать событие {data.get('type')}: {e}")
+            return 200, "ok"                           # иначе VK будет повторять его
+        await self._events.put(event)                  # ждём, если обработка не успевает
+        return 200, "ok"
+
+    async def _handle_request(self, method: str, path: str, body: bytes) -> Tuple[int, str]:
+        path = path.split("?", 1)[0]
+        if method == "GET" and path == "/health":
+            return 200, "ok"
+        if path != self.path:
+            return 404, "not found"
+        if method != "POST":
+            return 405, "method not allowed"
+        return await self.handle_event(body)
+
+    # -----------------------------------------------------------------
+    # HTTP
+    # -----------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", "0"))
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, "payload too large", keep_alive=False)
+                    break
+                body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT) if length else b""
+
+                try:
+                    status, text = await self._handle_request(method, path, body)
+                except Exception as e:
+                    logger.exception("Callback: ошибка обработки запроса: %s", e)
+                    status, text = 500, "internal error"
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                await self._respond(writer, status, text, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass                                       # клиент ушёл или прислал мусор
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, text: str, keep_alive: bool) -> None:
+        body = text.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: text/plain; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _receive_loop(self) -> None:
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.bound_port = server.sockets[0].getsockname()[1]
+        logger.info(f"Callback API слушает http://{self.host}:{self.bound_port}{self.path}")
+        async with server:
+            await server.serve_forever()
+
+
+def run_callback_bot() -> None:
+    """Точка входа для BOT_RUNNER=callback."""
+    if not CALLBACK_CONFIRMATION:
+        logger.warning("CALLBACK_CONFIRMATION не задан — VK не сможет подтвердить адрес сервера")
+    if not CALLBACK_SECRET:
+        logger.warning("CALLBACK_SECRET не задан — события не проверяются секретным ключом")
+    logger.info("Запускаем бота VK Education (Callback API)…")
+    runner = CallbackBotRunner(
+        VkHttpClient(TOKEN),
+        GROUP_ID,
+        confirmation=CALLBACK_CONFIRMATION,
+        secret=CALLBACK_SECRET,
+        host=CALLBACK_HOST,
+        port=CALLBACK_PORT,
+        path=CALLBACK_PATH,
+    )
+    asyncio.run(runner.run())
+
+
+# ---------------------------------------------------------------------
+# Отправка записанных событий на работающий сервер
+# ---------------------------------------------------------------------
+
+
+def post_events(url: str, events: Any, secret: str = "") -> None:
+    """POST каждого события на url, печатает ответ сервера."""
+    import requests
+
+    with requests.Session() as session:
+        for event in events:
+            if secret and event.get("type") != "confirmation":
+                event = {**event, "secret": secret}
+            response = session.post(url, data=json.dumps(event, ensure_ascii=False).encode("utf-8"),
+                                    headers={"Content-Type": "application/json"}, timeout=10)
+            print(f"{event.get('type'):<16} → {response.status_code} {response.text!r}")
+
+
+def _load_events(path: Path) -> Any:
+    """JSON-массив, одно событие или JSON Lines (по событию в строке)."""
+    text = path.read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data if isinstance(data, list) else [data]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Отправка записанных событий Callback API на локальный сервер")
+    parser.add_argument("file", type=Path, help="JSON (событие или массив) или JSON Lines")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/", help="адрес сервера бота")
+    parser.add_argument("--secret", default="", help="подставить секретный ключ в события")
+    args = parser.parse_args()
+
+    post_events(args.url, _load_events(args.file), args.secret)
@@ -9,3 +9,62 @@ TOKEN = os.getenv("TOKEN")
 GROUP_ID = int(os.getenv("GROUP_ID"))
 
 API_URL_TEMPLATE = "https://store.tildaapi.com/api/getproductslist/?storepartuid=357127554781&recid=754421136&c=1747853475696&getparts=true&getoptions=true&slice={slice_num}&sort%5B"
+
+# Адрес и версия VK API (адрес можно подменить на локальный фейковый сервер)
+VK_API_URL = os.getenv("VK_API_URL", "https://api.vk.ru/method/")
+VK_API_VERSION = os.getenv("VK_API_VERSION", "5.199")
+
+# Режим запуска: sync — классический run_bot, async — asyncio-раннер,
+# callback — asyncio-раннер, получающий события через Callback API,
+# processes — longpoll в главном процессе, ответы в PROCESS_COUNT процессах
+BOT_RUNNER = os.getenv("BOT_RUNNER", "sync")
+# Сколько вызовов messages.send могут быть «в полёте» одновременно
+SEND_CONCURRENCY = int(os.getenv("SEND_CONCURRENCY", "16"))
+
+# Пул обработчиков синхронного режима: число потоков и общий размер очереди
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "8"))
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+# Число процессов-воркеров в режиме processes (по умолчанию — по числу ядер)
+PROCESS_COUNT = int(os.getenv("PROCESS_COUNT", str(os.cpu_count() or 2)))
+
+# Лимит запросов к VK API в секунду (для токена сообщества — 20)
+SEND_RPS = float(os.getenv("SEND_RPS", "20"))
+
+# Парсер Тильды: сколько страниц (slice) каталога качать одновременно
+PARSER_CONCURRENCY = int(os.getenv("PARSER_CONCURRENCY", "4"))
+# Каталог HTTP-кэша парсера (ETag/Last-Modified); пусто — без кэша
+PARSER_CACHE_DIR = os.getenv("PARSER_CACHE_DIR", str(ROOT / "data" / "http_cache"))
+
+# Обновление базы знаний: как часто проверять файлы data/*.json (сек)
+# и как часто запускать парсер Тильды (часов, 0 — не запускать)
+KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "30"))
+PARSER_INTERVAL_HOURS = float(os.getenv("PARSER_INTERVAL_HOURS", "0"))
+
+# Логирование: уровень, формат (json — JSON-строки, text — как раньше),
+# выборка по категориям записей ("message=0.1,reply=0.1" — писать 10%) и
+# общий лимит записей уровня INFO и ниже в секунду (0 — без лимита)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "")
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "100"))
+
+# Метрики Prometheus: GET /metrics на METRICS_HOST:METRICS_PORT (0 — выключено).
+# В режиме processes воркер i слушает METRICS_PORT + 1 + i
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# Файл с последним обработанным ts longpoll (пусто — не сохранять)
+LONGPOLL_STATE_PATH = os.getenv("LONGPOLL_STATE_PATH", str(ROOT / "data" / "longpoll_state.json"))
+
+# Дедупликация входящих событий: сколько секунд помнить событие и сколько
+# событий помнить максимум (ограничивает память)
+DEDUP_TTL = float(os.getenv("DEDUP_TTL", "600"))
+DEDUP_MAX_EVENTS = int(os.getenv("DEDUP_MAX_EVENTS", "10000"))
+
+# Callback API (BOT_RUNNER=callback): строка подтверждения и секретный ключ
+# из настроек сообщества, адрес, на котором слушает HTTP-сервер
+CALLBACK_CONFIRMATION = os.getenv("CALLBACK_CONFIRMATION", "")
+CALLBACK_SECRET = os.getenv("CALLBACK_SECRET", "")
+CALLBACK_HOST = os.getenv("CALLBACK_HOST", "0.0.0.0")
+CALLBACK_PORT = int(os.getenv("CALLBACK_PORT", "8080"))
+CALLBACK_PATH = os.getenv("CALLBACK_PATH", "/")
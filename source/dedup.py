@@ -0,0 +1,91 @@
+# dedup.py - окно дедупликации входящих событий
+# ---------------------------------------------------------------------
+# После переподключения или повтора ts longpoll одно и то же сообщение
+# может прийти дважды — и пользователь получил бы два одинаковых ответа.
+# EventDeduplicator помнит ключи недавних событий:
+#   • ключ сообщения — (peer_id, conversation_message_id), иначе event_id;
+#   • запись живёт DEDUP_TTL секунд (TTL), повторное попадание продлевает её;
+#   • записей не больше DEDUP_MAX_EVENTS — самые давние вытесняются (LRU),
+#     так что память ограничена при любом потоке событий.
+# Проверка идёт в build_reply до разбора payload-а и бизнес-логики.
+# ---------------------------------------------------------------------
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from source.config import DEDUP_TTL, DEDUP_MAX_EVENTS
+
+
+def event_key(event) -> Optional[Hashable]:
+    """Ключ дедупликации события longpoll; None — событие не с чем сравнивать."""
+    msg = getattr(event, "message", None)
+    if msg:
+        peer_id = msg.get("peer_id") or msg.get("from_id")
+        cmid = msg.get("conversation_message_id")
+        if peer_id and cmid:
+            return peer_id, cmid
+    raw = getattr(event, "raw", None)
+    event_id = raw.get("event_id") if isinstance(raw, dict) else None
+    return event_id or None
+
+
+class EventDeduplicator:
+    """Потокобезопасный набор недавних ключей с TTL и ограничением размера."""
+
+    def __init__(self,
+                 ttl: float = DEDUP_TTL,
+                 max_size: int = DEDUP_MAX_EVENTS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_size = max(max_size, 1)
+        self._clock = clock
+        self._seen: "OrderedDict[Hashable, float]" = OrderedDict()   # ключ → срок годности
+        self._lock = threading.Lock()
+
+        self.checked = 0           # счётчики — для логов и метрик
+        self.hits = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def seen(self, key: Optional[Hashable]) -> bool:
+        """True — ключ уже встречался в окне (событие нужно пропустить)."""
+        if key is None:
+            return False
+        now = self._clock()
+        seen = self._seen
+        with self._lock:
+            self.checked += 1
+            # сроки идут в порядке вставки (TTL общий), поэтому чистим с начала
+            while seen:
+                oldest, expires = next(iter(seen.items()))
+                if expires > now:
+                    break
+                del seen[oldest]
+                self.expired += 1
+
+            duplicate = key in seen
+            if duplicate:
+                self.hits += 1
+                seen.move_to_end(key)
+            elif len(seen) >= self.max_size:
+                seen.popitem(last=False)
+                self.evicted += 1
+            seen[key] = now + self.ttl
+            return duplicate
+
+    def is_duplicate(self, event) -> bool:
+        return self.seen(event_key(event))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._seen),
+                "checked": self.checked,
+                "hits": self.hits,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
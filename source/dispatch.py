@@ -0,0 +1,102 @@
+# dispatch.py - общий путь «событие VK → параметры messages.send»
+# ---------------------------------------------------------------------
+# Используется и синхронным run_bot, и асинхронным раннером, чтобы
+# разбор payload-а и вызов generate_keyboard_response были в одном месте.
+# ---------------------------------------------------------------------
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from vk_api.bot_longpoll import VkBotEventType
+from vk_api.utils import get_random_id
+
+from source.bot_logic import generate_keyboard_response      # Бизнес-логика ответа
+from source.bot_logic import invalid_payload_response        # Ответ на неразборчивый payload
+from source.bot_data import ERROR_FALLBACK_MESSAGE           # Запасной ответ при ошибке
+from source.payload import decode_payload                    # Компактный и старый формат payload
+from source.dedup import EventDeduplicator                   # Окно повторно доставленных событий
+from source.metrics import EVENTS_RECEIVED, EVENTS_DUPLICATE  # Счётчики для /metrics
+
+logger = logging.getLogger(__name__)
+
+EVENT_DEDUP = EventDeduplicator()                             # Общее для всех раннеров
+
+
+def build_reply(event) -> Optional[Dict[str, Any]]:
+    """
+    Превращает событие longpoll в параметры messages.send.
+    None — если отвечать не нужно (чужой тип события, чат, повтор уже
+    обработанного события, пустое сообщение или пустой ответ бизнес-логики).
+    """
+    EVENTS_RECEIVED.inc(getattr(event.type, "value", event.type))  # Неизвестный тип vk_api оставляет строкой
+    if event.type != VkBotEventType.MESSAGE_NEW:      # Нас интересуют только новые сообщения
+        return None
+    if not event.from_user:                           # Игнорируем сообщения из чатов/ботов
+        return None
+    if EVENT_DEDUP.is_duplicate(event):               # Повтор после переподключения/ts
+        EVENTS_DUPLICATE.inc()
+        logger.info("Повторное событие %s от %s пропущено",
+                    event.message.get("conversation_message_id"), event.message.get("from_id"),
+                    extra={"category": "duplicate", "user_id": event.message.get("from_id")})
+        return None
+
+    msg = event.message                               # Объект сообщения
+    user_id = msg.from_id                             # ID пользователя
+    raw_text = (msg.text or "").strip()               # Текст сообщения
+
+    payload = None                                    # Значение payload по умолчанию
+    invalid_payload = False                           # payload есть, но разобрать его нельзя
+    if msg.payload:                                   # Если payload присутствует
+        try:
+            payload = decode_payload(json.loads(msg.payload))  # JSON → {"cmd", "depth", "data"}
+            invalid_payload = payload is None         # Компактный payload неизвестного вида
+        except Exception as e:                        # Битый JSON или payload, подделанный руками
+            logger.warning(                           # Логируем ошибку парсинга payload
+                "Не удалось распарсить payload %s: %s", msg.payload, e
+            )
+            invalid_payload = True
+
+    if not raw_text and not payload and not invalid_payload:  # Если сообщение пустое и без payload
+        return None
+
+    # ----------------------- ВЫЗОВ БИЗНЕС-ЛОГИКИ ---------------------------
+    started = time.perf_counter()
+    try:
+        if invalid_payload:                           # Не угадываем команду — отвечаем главным меню
+            response_text, keyboard_json = invalid_payload_response()
+        else:
+            response_text, keyboard_json = generate_keyboard_response(
+                user_id=user_id,
+                text=raw_text,
+                payload=payload,
+            )
+    except Exception as e:                            # Ловим ошибки логики
+        logger.exception(                             # Пишем стек-трейс
+            "Ошибка в generate_keyboard_response: %s", e
+        )
+        response_text, keyboard_json = ERROR_FALLBACK_MESSAGE, None
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    # ---------------- ЛОГ — входящее сообщение и время ответа ----------------
+    # Строка собирается в фоновом потоке логирования и только если запись
+    # прошла выборку и лимит (source/log_setup.py)
+    cmd = payload.get("cmd") if isinstance(payload, dict) else None
+    logger.info(
+        "Пользователь %s прислал: '%s' | payload=%s | ответ за %s мс",
+        user_id, raw_text[:200], payload, latency_ms,
+        extra={"category": "message", "user_id": user_id, "cmd": cmd, "latency_ms": latency_ms},
+    )
+
+    if not response_text:                             # Если ответ пустой — ничего не шлём
+        return None
+
+    params = {                                        # Параметры метода messages.send
+        "peer_id": user_id,                           # Адресат
+        "message": response_text,                     # Текст ответа
+        "random_id": get_random_id(),                 # Случайный ID для уникальности
+    }
+
+    if keyboard_json:                                 # При наличии клавиатуры
+        params["keyboard"] = keyboard_json            # Добавляем её в параметры
+    return params
@@ -0,0 +1,195 @@
+# fake_tilda.py - локальная подмена API каталога Тильды для проверки парсера
+# ---------------------------------------------------------------------
+# Отдаёт проекты страницами (slice) в формате getproductslist:
+#   GET /api/getproductslist/?slice=N → {"total", "products", "filters"}
+# Можно задать задержку ответа, сбои отдельных страниц (HTTP 503) и
+# скрыть total. Ответы несут ETag (на If-None-Match — 304) и сжимаются
+# gzip, если клиент это поддерживает. Запуск сравнения последовательной и
+# параллельной загрузки и повторного запуска с HTTP-кэшем:
+#   python -m source.fake_tilda --latency 0.3 --per-slice 10
+# ---------------------------------------------------------------------
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+_FILTER_LABELS = {"directions": "Направление", "durations": "Длительность работы"}
+
+
+def to_tilda_product(project: Dict[str, Any]) -> Dict[str, Any]:
+    """Проект из knowledge_base.json → товар в формате API Тильды."""
+    return {
+        "title": project["title"],
+        "text": project.get("full_description", ""),
+        "descr": project.get("short_description", ""),
+        "brand": project.get("link_to_project", ""),
+        "characteristics": [
+            {"title": "Направление", "value": project.get("direction")},
+            {"title": "Длительность работы", "value": project.get("duration")},
+        ],
+    }
+
+
+class FakeTildaServer:
+    """
+    Фейковый API Тильды на 127.0.0.1. Адрес для парсера — url_template,
+    число запросов к каждой странице — self.requests, ответов по кодам —
+    self.statuses, отправлено байт тела — self.bytes_sent.
+    """
+
+    def __init__(self,
+                 projects: List[Dict[str, Any]],
+                 filters: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 per_slice: int = 36,
+                 latency: float = 0.0,
+                 failures: Optional[Dict[int, int]] = None,
+                 report_total: bool = True,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.products = [to_tilda_product(p) for p in projects]
+        self.filters = filters or {}
+        self.per_slice = per_slice
+        self.latency = latency                     # задержка каждого ответа, сек
+        self.failures = dict(failures or {})       # slice → сколько раз подряд ответить 503
+        self.report_total = report_total
+        self.requests: Dict[int, int] = {}
+        self.statuses: Dict[int, int] = {}
+        self.bytes_sent = 0
+
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url_template(self) -> str:
+        """Значение для API_URL_TEMPLATE."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/getproductslist/?getparts=true&slice={{slice_num}}"
+
+    def start(self) -> "FakeTildaServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _page(self, slice_number: int) -> Optional[Dict[str, Any]]:
+        """Тело ответа или None, если страница должна «упасть»."""
+        with self._lock:
+            self.requests[slice_number] = self.requests.get(slice_number, 0) + 1
+            if self.failures.get(slice_number, 0) > 0:
+                self.failures[slice_number] -= 1
+                return None
+        start = (slice_number - 1) * self.per_slice
+        body: Dict[str, Any] = {"products": self.products[start:start + self.per_slice]}
+        if self.report_total:
+            body["total"] = len(self.products)
+        if slice_number == 1:
+            body["filters"] = {"filters": [
+                {"label": _FILTER_LABELS[key], "values": values} for key, values in self.filters.items()
+            ]}
+        return body
+
+    def _count(self, status: int, size: int = 0) -> None:
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.bytes_sent += size
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/api/getproductslist/":
+                    self.send_error(404)
+                    return
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server._page(int(query.get("slice") or 1))
+                if body is None:
+                    server._count(503)
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    server._count(304)
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("ETag", etag)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    data = gzip.compress(data)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                server._count(200, len(data))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка парсера на фейковом API Тильды")
+    parser.add_argument("--latency", type=float, default=0.3, help="задержка ответа, сек")
+    parser.add_argument("--per-slice", type=int, default=10, help="проектов на странице")
+    parser.add_argument("--fail", type=int, nargs="*", default=[2], help="страницы, первый ответ которых — 503")
+    parser.add_argument("--no-total", action="store_true", help="не сообщать total")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TOKEN", "fake-token")
+    os.environ.setdefault("GROUP_ID", "1")
+    from source import projects_parser
+
+    kb_path = projects_parser.KNOWLEDGE_BASE_FILE
+    kb = json.loads(kb_path.read_text(encoding="utf-8"))
+    projects_parser.BACKOFF_BASE = 0.05             # в замере паузы между попытками не интересны
+
+    for concurrency in (1, projects_parser.PARSER_CONCURRENCY):
+        fake = FakeTildaServer(kb["available_projects"], kb["available_filters"],
+                               per_slice=args.per_slice, latency=args.latency,
+                               failures={n: 1 for n in args.fail}, report_total=not args.no_total).start()
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "knowledge_base.json"
+            started = time.monotonic()
+            projects_parser.parse_and_save_data(fake.url_template, out, concurrency, cache_dir=None)
+            elapsed = time.monotonic() - started
+            same = json.loads(out.read_text(encoding="utf-8")) == kb
+        fake.stop()
+        print(f"concurrency={concurrency:<3} {elapsed:6.2f} с, запросов {sum(fake.requests.values())}, "
+              f"совпадает с {kb_path.name}: {same}")
+
+    # Два запуска подряд с HTTP-кэшем: второй должен обойтись ответами 304
+    fake = FakeTildaServer(kb["available_projects"], kb["available_filters"],
+                           per_slice=args.per_slice, latency=args.latency).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "knowledge_base.json"
+        for run in ("холодный кэш", "повторный запуск"):
+            fake.statuses.clear()
+            fake.bytes_sent = 0
+            projects_parser.parse_and_save_data(fake.url_template, out, projects_parser.PARSER_CONCURRENCY,
+                                                cache_dir=Path(tmp) / "http_cache")
+            codes = ", ".join(f"{code}×{count}" for code, count in sorted(fake.statuses.items()))
+            print(f"{run:<17} ответы {codes}, тело {fake.bytes_sent / 1024:.1f} КБ")
+    fake.stop()
@@ -0,0 +1,301 @@
+# fake_vk.py - локальная подмена VK API для офлайн-замеров
+# ---------------------------------------------------------------------
+# Реализует ровно то, что нужно боту:
+#   POST /method/groups.getLongPollServer  → адрес локального longpoll
+#   GET  /lp?act=a_check&key=…&ts=…&wait=… → события с номером > ts
+#   POST /method/messages.send             → «отправка» с искусственной задержкой
+#   POST /method/execute                   → пачка API.messages.send({...}) из VKScript
+# Запуск замера:  python -m source.fake_vk --events 500 --latency 0.05
+# ---------------------------------------------------------------------
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+FAKE_GROUP_ID = 1
+LONGPOLL_KEY = "fake-key"
+_SEND_CALL = "API.messages.send("
+
+
+class FakeVkServer:
+    """
+    Фейковый VK API на 127.0.0.1. События добавляются через push_message(),
+    отправленные ботом сообщения копятся в self.sent.
+    """
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 send_latency: float = 0.0,
+                 rps_limit: Optional[float] = None):
+        self.send_latency = send_latency           # задержка одного messages.send / execute, сек
+        self.rps_limit = rps_limit                 # лимит запросов/с, сверх него — ошибка 6
+        self.blocked_peers: set = set()            # этим peer_id отправка падает с ошибкой 901
+        self.throttled = 0                         # сколько запросов отклонено лимитом
+        self.lp_key = LONGPOLL_KEY                 # действующий ключ longpoll (см. expire_key)
+
+        self.sent: List[Dict[str, Any]] = []       # параметры отправленных сообщений
+        self.calls: Dict[str, int] = {}            # счётчики вызовов методов
+
+        self._events: List[Dict[str, Any]] = []    # события longpoll, ts = индекс + 1
+        self._cond = threading.Condition()
+        self._next_message_id = 1
+        self._request_times: deque = deque()       # моменты запросов за последнюю секунду
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # -----------------------------------------------------------------
+    # Управление сервером
+    # -----------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        """Значение для VK_API_URL."""
+        return self.base_url + "/method/"
+
+    def start(self) -> "FakeVkServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # -----------------------------------------------------------------
+    # События и результаты
+    # -----------------------------------------------------------------
+
+    def push_event(self, raw_event: Dict[str, Any]) -> None:
+        with self._cond:
+            self._events.append(raw_event)
+            self._cond.notify_all()
+
+    def push_message(self, user_id: int, text: str = "", payload: Optional[dict] = None) -> None:
+        """Добавляет событие message_new от пользователя user_id."""
+        with self._cond:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+        message = {
+            "id": message_id,
+            "conversation_message_id": message_id,
+            "date": int(time.time()),
+            "from_id": user_id,
+            "peer_id": user_id,
+            "text": text,
+        }
+        if payload is not None:
+            message["payload"] = json.dumps(payload, ensure_ascii=False)
+        self.push_event({
+            "type": "message_new",
+            "object": {"message": message, "client_info": {"keyboard": True}},
+            "group_id": FAKE_GROUP_ID,
+            "event_id": f"fake{message_id}",
+        })
+
+    def expire_key(self) -> None:
+        """Старый ключ longpoll перестаёт действовать (клиент получит failed: 2)."""
+        with self._cond:
+            self.lp_key = f"{LONGPOLL_KEY}-{len(self._events)}-{time.monotonic_ns()}"
+
+    def wait_sent(self, count: int, timeout: float = 30.0) -> bool:
+        """Ждёт, пока бот отправит не меньше count сообщений."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self.sent) < count:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    # -----------------------------------------------------------------
+    # Обработка запросов
+    # -----------------------------------------------------------------
+
+    def _over_rate_limit(self) -> bool:
+        if not self.rps_limit:
+            return False
+        now = time.monotonic()
+        with self._cond:
+            while self._request_times and now - self._request_times[0] > 1.0:
+                self._request_times.popleft()
+            if len(self._request_times) >= self.rps_limit:
+                self.throttled += 1
+                return True
+            self._request_times.append(now)
+        return False
+
+    def _send_one(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Одна «отправка»: {"response": id} или {"error": {...}}."""
+        if int(values.get("peer_id") or 0) in self.blocked_peers:
+            return {"error": {"method": "messages.send", "error_code": 901,
+                              "error_msg": "Can't send messages for users without permission"}}
+        with self._cond:
+            self.sent.append(dict(values, sent_at=time.monotonic()))
+            message_id = len(self.sent)
+            self._cond.notify_all()
+        return {"response": message_id}
+
+    def _execute(self, code: str) -> Dict[str, Any]:
+        """Понимает только код вида return [API.messages.send({...}), …];"""
+        decoder = json.JSONDecoder()
+        results, errors = [], []
+        pos = code.find(_SEND_CALL)
+        while pos != -1:
+            values, end = decoder.raw_decode(code, pos + len(_SEND_CALL))
+            outcome = self._send_one(values)
+            if "error" in outcome:
+                results.append(False)
+                errors.append(outcome["error"])
+            else:
+                results.append(outcome["response"])
+            pos = code.find(_SEND_CALL, end)
+        body: Dict[str, Any] = {"response": results}
+        if errors:
+            body["execute_errors"] = errors
+        return body
+
+    def _call_method(self, method: str, values: Dict[str, str]) -> Dict[str, Any]:
+        with self._cond:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method == "groups.getLongPollServer":
+            with self._cond:
+                ts = len(self._events)
+            return {"response": {"key": self.lp_key, "server": self.base_url + "/lp", "ts": str(ts)}}
+
+        if method in {"messages.send", "execute"}:
+            if self._over_rate_limit():
+                return {"error": {"error_code": 6, "error_msg": "Too many requests per second"}}
+            if self.send_latency:
+                time.sleep(self.send_latency)
+            if method == "execute":
+                return self._execute(values.get("code", ""))
+            return self._send_one(values)
+
+        return {"error": {"error_code": 3, "error_msg": f"Unknown method passed: {method}"}}
+
+    def _check(self, query: Dict[str, str]) -> Dict[str, Any]:
+        if query.get("key") != self.lp_key:
+            return {"failed": 2}
+        ts = int(query.get("ts") or 0)
+        wait = float(query.get("wait") or 25)
+        deadline = time.monotonic() + wait
+        with self._cond:
+            if ts > len(self._events):
+                return {"failed": 1, "ts": str(len(self._events))}
+            while ts >= len(self._events):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            updates = self._events[ts:]
+            return {"ts": str(ts + len(updates)), "updates": updates}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"           # keep-alive для пула соединений клиента
+
+            def _reply(self, body: Dict[str, Any]) -> None:
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                if url.path == "/lp":
+                    self._reply(server._check(query))
+                elif url.path.startswith("/method/"):
+                    self._reply(server._call_method(url.path[len("/method/"):], query))
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8")
+                values = {k: v[-1] for k, v in parse_qs(body, keep_blank_values=True).items()}
+                if url.path.startswith("/method/"):
+                    self._reply(server._call_method(url.path[len("/method/"):], values))
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):  # не засоряем вывод замера
+                pass
+
+        return Handler
+
+
+# ---------------------------------------------------------------------
+# Замер пропускной способности асинхронного раннера
+# ---------------------------------------------------------------------
+
+
+def measure_async_runner(events: int, users: int, latency: float, concurrency: int) -> float:
+    """
+    Прогоняет `events` сообщений через AsyncBotRunner и фейковый VK.
+    Возвращает пропускную способность, сообщений/с.
+    """
+    import asyncio
+
+    fake = FakeVkServer(send_latency=latency).start()
+    os.environ.setdefault("TOKEN", "fake-token")
+    os.environ.setdefault("GROUP_ID", str(FAKE_GROUP_ID))
+
+    from source.async_runner import AsyncBotRunner
+    from source.vk_http import VkHttpClient
+
+    client = VkHttpClient("fake-token", api_url=fake.api_url, pool_size=concurrency)
+    runner = AsyncBotRunner(client, FAKE_GROUP_ID, concurrency=concurrency, wait=1)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(runner.run(),), daemon=True)
+    thread.start()
+
+    while fake.calls.get("groups.getLongPollServer", 0) == 0:   # ждём подключения longpoll
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    for i in range(events):
+        fake.push_message(user_id=1000 + i % users, text="Привет")
+    ok = fake.wait_sent(events, timeout=max(60.0, events * latency * 2))
+    elapsed = time.monotonic() - started
+
+    loop.call_soon_threadsafe(runner.stop)
+    thread.join(timeout=5)
+    fake.stop()
+    if not ok:
+        raise RuntimeError(f"Отправлено только {len(fake.sent)} из {events} сообщений")
+    return events / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Офлайн-замер пропускной способности бота")
+    parser.add_argument("--events", type=int, default=300, help="сколько входящих сообщений")
+    parser.add_argument("--users", type=int, default=50, help="сколько разных пользователей")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка messages.send, сек")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16],
+                        help="значения лимита одновременных отправок для сравнения")
+    args = parser.parse_args()
+
+    for limit in args.concurrency:
+        rate = measure_async_runner(args.events, args.users, args.latency, limit)
+        print(f"concurrency={limit:<4} {rate:8.1f} сообщ./с")
@@ -0,0 +1,72 @@
+# faq_matcher.py - нечёткий поиск ответа в FAQ по свободному тексту
+# ---------------------------------------------------------------------
+# Вопросы FAQ готовятся один раз: нормализация, выброс стоп-слов и
+# окончаний (те же правила, что у поиска проектов). Входящий текст
+# готовится так же. Сравниваются только вопросы, у которых есть хотя бы
+# одно слово с тем же началом (первые PREFIX_LEN букв) — это переживает
+# опечатки в конце слова и сильно сужает перебор. Кандидаты оцениваются
+# одним вызовом rapidfuzz.process.extract (цикл идёт внутри C-кода).
+# token_set_ratio прощает лишние слова, но одно общее слово («проект»)
+# даёт ему высокую оценку, поэтому лучшие кандидаты дооцениваются
+# средним с token_sort_ratio, который учитывает и непохожие слова.
+# ---------------------------------------------------------------------
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from rapidfuzz import fuzz, process
+
+from source.search import tokenize
+
+DEFAULT_THRESHOLD = 75.0   # минимальная похожесть 0..100
+MIN_QUERY_TERMS = 2        # одно слово («дизайн») — это скорее поиск проекта, чем вопрос
+TOP_K = 5                  # сколько кандидатов дооцениваем
+PREFIX_LEN = 4             # по скольким первым буквам слова подбираем кандидатов
+
+
+def prepare(text: str) -> str:
+    """Текст → строка из значимых основ слов"""
+    return " ".join(tokenize(text))
+
+
+class FaqMatcher:
+    """
+    Сопоставляет текст пользователя с вопросами FAQ.
+    match() возвращает (индекс вопроса, оценка) или None.
+    """
+
+    def __init__(self, questions: List[str], threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.choices = [prepare(q) for q in questions]
+        self._by_prefix: Dict[str, List[int]] = defaultdict(list)
+        for idx, choice in enumerate(self.choices):
+            for prefix in {term[:PREFIX_LEN] for term in choice.split()}:
+                self._by_prefix[prefix].append(idx)
+
+    def match(self, text: str) -> Optional[Tuple[int, float]]:
+        return self.match_terms(tokenize(text))
+
+    def match_terms(self, terms: Sequence[str]) -> Optional[Tuple[int, float]]:
+        """То же, что match(), для уже разобранного текста (см. source/preprocess.py)."""
+        if len(terms) < MIN_QUERY_TERMS:
+            return None
+        query = " ".join(terms)
+        ids: Set[int] = set()
+        for term in terms:
+            ids.update(self._by_prefix.get(term[:PREFIX_LEN], ()))
+        if not ids:
+            return None
+        # token_set_ratio >= token_sort_ratio, поэтому отсечка по порогу здесь безопасна
+        candidates = process.extract(
+            query,
+            {idx: self.choices[idx] for idx in ids},
+            scorer=fuzz.token_set_ratio,
+            processor=None,                   # варианты уже подготовлены
+            limit=TOP_K,
+            score_cutoff=self.threshold,
+        )
+        best: Optional[Tuple[int, float]] = None
+        for _, set_score, idx in candidates:
+            score = (set_score + fuzz.token_sort_ratio(query, self.choices[idx])) / 2
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (idx, score)
+        return best
@@ -2,7 +2,11 @@
 # Здесь собраны все функции, которые генерируют клавиатуры VK.
 # --------------------------------------------------------------------
 import json  # превращаем dict -> JSON-строку
-from typing import List, Dict, Any  # подсказки типов
+import threading  # защита кэша при пересборке из нескольких потоков
+from typing import List, Dict, Any, NamedTuple  # подсказки типов
+
+from source import payload as payload_codec  # компактная кодировка payload-а кнопок
+from source.metrics import KEYBOARD_SECONDS  # время сборки клавиатур на каждое сообщение
 
 # VK понимает четыре цвета кнопок: primary / secondary / positive / negative
 Color = str  # для короткой записи
@@ -40,16 +44,11 @@ def make_btn(
     """
     Возвращает dict в формате VK «готовая кнопка».
     """
-    # формируем payload, который уйдёт бот-логике
-    payload: Dict[str, Any] = {"cmd": cmd, "depth": depth}
-    if data:  # если есть доп. данные…
-        payload["data"] = data  # …добавляем их
-
     return {
         "action": {
             "type": "text",  # обычная кнопка-текст
             "label": label,  # подпись
-            "payload": json.dumps(payload, ensure_ascii=False)  # JSON-payload
+            "payload": payload_codec.encode_payload(cmd, depth, data)  # JSON-payload (компактный)
         },
         "color": color  # цвет кнопки
     }
@@ -162,6 +161,7 @@ def kb_find_menu(depth: int = 1) -> str:
 # ---------------------------------------------------------------------
 
 
+@KEYBOARD_SECONDS.timed("faq_page")
 def kb_faq_page(faq_list: List[dict],
                 page: int,
                 page_size: int,
@@ -236,13 +236,16 @@ def kb_durations_menu(durations: List[Dict[str, Any]],
     return json.dumps({"buttons": rows, "one_time": False}, ensure_ascii=False)
 
 
+@KEYBOARD_SECONDS.timed("projects_page")
 def kb_projects_page(projects: List[Dict[str, Any]],
                      page: int,
                      page_size: int,
                      depth: int,
-                     extra_filter: Dict[str, str] | None = None) -> str:
+                     extra_filter: Dict[str, str] | None = None,
+                     page_cmd: str = "projects_page") -> str:
     """
     Формирует клавиатуру со списком проектов (по кнопке «Подробнее» каждый).
+    page_cmd — команда стрелок пагинации (для результатов поиска — search_page).
     """
     rows = []
     for p in _paginate(projects, page, page_size):
@@ -253,7 +256,7 @@ def kb_projects_page(projects: List[Dict[str, Any]],
                 cmd="project_details",
                 depth=depth,  # остаёмся на том же уровне
                 data={  # передаём КОНТЕКСТ
-                    "title": p["title"],
+                    **({"id": p["id"]} if payload_codec.COMPACT_PAYLOADS else {"title": p["title"]}),
                     **(extra_filter or {}),
                     "page": page
                 }
@@ -265,14 +268,14 @@ def kb_projects_page(projects: List[Dict[str, Any]],
     if page > 0:
         # передаём те же фильтры + уменьшенный page
         nav_row.append(
-            make_btn("⬅ Предыдущие", "projects_page",
+            make_btn("⬅ Предыдущие", page_cmd,
                      depth=depth,
                      color=SECONDARY,
                      data={"page": page - 1, **(extra_filter or {})})
         )
     if (page + 1) * page_size < len(projects):
         nav_row.append(
-            make_btn("Следующие ➡", "projects_page",
+            make_btn("Следующие ➡", page_cmd,
                      depth=depth,
                      color=SECONDARY,
                      data={"page": page + 1, **(extra_filter or {})})
@@ -298,7 +301,60 @@ def kb_projects_page(projects: List[Dict[str, Any]],
 
 
 # --------------------------------------------------------------------
-# 7. Экспортируем функции, которые понадобятся снаружи
+# 7. Кэш статических клавиатур
+# --------------------------------------------------------------------
+# Главное меню, меню поиска и списки направлений/длительностей зависят
+# только от knowledge_base.json, поэтому собираем их JSON один раз на версию
+# данных и дальше отдаём готовые строки (их VK и принимает в keyboard=...).
+
+
+class StaticKeyboards(NamedTuple):
+    """Готовые JSON-строки статических меню для одной версии данных."""
+    version: str
+    main_menu: str
+    find_menu: str
+    directions_menu: str
+    durations_menu: str
+
+
+def build_static_keyboards(directions: List[Dict[str, Any]],
+                           durations: List[Dict[str, Any]],
+                           version: str) -> StaticKeyboards:
+    """Собирает все статические меню с теми же depth, что использует bot_logic."""
+    return StaticKeyboards(
+        version=version,
+        main_menu=kb_main_menu(),
+        find_menu=kb_find_menu(depth=1),
+        directions_menu=kb_directions_menu(directions, depth=2),
+        durations_menu=kb_durations_menu(durations, depth=2),
+    )
+
+
+class KeyboardCache:
+    """
+    Хранит StaticKeyboards последней версии данных.
+    get() пересобирает клавиатуры только если версия изменилась.
+    """
+
+    def __init__(self):
+        self._current: StaticKeyboards | None = None
+        self._lock = threading.Lock()
+
+    def get(self,
+            version: str,
+            directions: List[Dict[str, Any]],
+            durations: List[Dict[str, Any]]) -> StaticKeyboards:
+        current = self._current
+        if current is not None and current.version == version:
+            return current
+        with self._lock:  # пересобираем один раз, даже если запросов много
+            if self._current is None or self._current.version != version:
+                self._current = build_static_keyboards(directions, durations, version)
+            return self._current
+
+
+# --------------------------------------------------------------------
+# 8. Экспортируем функции, которые понадобятся снаружи
 # --------------------------------------------------------------------
 __all__ = [
     "kb_main_menu",
@@ -310,6 +366,9 @@ __all__ = [
     "make_btn",
     "nav_tail",
     "list_to_rows",
+    "StaticKeyboards",
+    "build_static_keyboards",
+    "KeyboardCache",
     "PRIMARY",
     "SECONDARY",
     "POSITIVE",
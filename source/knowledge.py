@@ -0,0 +1,125 @@
+# knowledge.py - снимок базы знаний (проекты + FAQ) с горячей перезагрузкой
+# ---------------------------------------------------------------------
+# KnowledgeSnapshot собирается целиком (JSON, индекс поиска, FAQ-матчер)
+# и после публикации только читается. KnowledgeStore держит ссылку на
+# текущий снимок; refresh() (его по расписанию зовёт APScheduler из
+# main.py) строит новый снимок в фоновом потоке и подменяет ссылку одним
+# присваиванием. Обработчик сообщения берёт снимок один раз в начале и
+# до конца работает с согласованными данными, а чтение снимка не ждёт
+# никаких блокировок.
+# ---------------------------------------------------------------------
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from source.faq_matcher import FaqMatcher, DEFAULT_THRESHOLD
+from source.payload import facet_table
+from source.project_store import Project, ProjectStore
+from source.search import ProjectSearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeSnapshot:
+    """
+    Данные одной версии knowledge_base.json + faq.json.
+    version меняется вместе с содержимым любого из файлов.
+    """
+
+    def __init__(self, kb_bytes: bytes, faq_bytes: bytes, faq_threshold: float = DEFAULT_THRESHOLD):
+        kb = json.loads(kb_bytes)
+        faq = json.loads(faq_bytes)
+
+        digest = hashlib.sha1(kb_bytes)
+        digest.update(faq_bytes)
+        self.version: str = digest.hexdigest()[:12]
+
+        self.store = ProjectStore(kb["available_projects"])
+        self.projects: Tuple[Project, ...] = self.store.projects
+        self.directions: Tuple[Dict[str, Any], ...] = tuple(kb["available_filters"]["directions"])
+        self.durations: Tuple[Dict[str, Any], ...] = tuple(kb["available_filters"]["durations"])
+        # facet_id → направление/длительность, для компактных payload-ов кнопок
+        self.facets: Dict[int, str] = facet_table(
+            [item["value"] for item in self.directions + self.durations]
+            + [value for p in self.projects for value in (p.direction, p.duration)]
+        )
+
+        self.faq_list: Tuple[Dict[str, str], ...] = tuple(faq["available_answered_questions"])
+        self.faq_by_id: Dict[int, str] = {i: item["answer"] for i, item in enumerate(self.faq_list)}
+
+        # тяжёлые структуры строим здесь, а не на первом сообщении
+        self.search_index = ProjectSearchIndex(list(self.projects))
+        self.faq_matcher = FaqMatcher([item["question"] for item in self.faq_list], threshold=faq_threshold)
+
+    @classmethod
+    def from_files(cls, kb_path: Path, faq_path: Path, faq_threshold: float = DEFAULT_THRESHOLD):
+        return cls(kb_path.read_bytes(), faq_path.read_bytes(), faq_threshold)
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class KnowledgeStore:
+    """
+    Текущий KnowledgeSnapshot + перезагрузка при изменении файлов.
+    current читается без блокировок; refresh() можно звать из любого потока.
+    """
+
+    def __init__(self, kb_path: Path, faq_path: Path, faq_threshold: float = DEFAULT_THRESHOLD):
+        self.kb_path = kb_path
+        self.faq_path = faq_path
+        self.faq_threshold = faq_threshold
+        self._lock = threading.Lock()              # только между обновляющими потоками
+        self._listeners: List[Callable[[KnowledgeSnapshot], None]] = []
+        self._stamps = self._read_stamps()
+        self._current = KnowledgeSnapshot.from_files(kb_path, faq_path, faq_threshold)
+
+    @property
+    def current(self) -> KnowledgeSnapshot:
+        return self._current
+
+    def subscribe(self, listener: Callable[[KnowledgeSnapshot], None]) -> None:
+        """listener(snapshot) вызывается после каждой подмены снимка."""
+        self._listeners.append(listener)
+
+    def publish(self, snapshot: KnowledgeSnapshot) -> None:
+        """Подменяет снимок готовым (собранным не из файлов, например в бенчмарке)."""
+        with self._lock:
+            self._current = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+
+    def _read_stamps(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        return _file_stamp(self.kb_path), _file_stamp(self.faq_path)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Перечитывает файлы, если изменились их mtime/размер (или force).
+        Возвращает True, если снимок подменён. Битый файл (например,
+        недописанный) оставляет в работе прежний снимок.
+        """
+        with self._lock:
+            try:
+                stamps = self._read_stamps()
+                if not force and stamps == self._stamps:
+                    return False
+                snapshot = KnowledgeSnapshot.from_files(self.kb_path, self.faq_path, self.faq_threshold)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Не удалось перечитать базу знаний, работаем со старой версией: {e}")
+                return False
+            self._stamps = stamps
+            if snapshot.version == self._current.version:
+                return False
+            old_version = self._current.version
+            self._current = snapshot                # атомарная подмена ссылки
+        logger.info(f"База знаний обновлена: {old_version} → {snapshot.version}, "
+                    f"проектов {len(snapshot.projects)}, вопросов FAQ {len(snapshot.faq_list)}")
+        for listener in self._listeners:
+            listener(snapshot)
+        return True
+
@@ -0,0 +1,198 @@
+# loadtest.py - нагрузочный прогон бота на фейковом VK API
+# ---------------------------------------------------------------------
+# Поднимает FakeVkServer (longpoll + messages.send/execute), направляет на
+# него настоящий конвейер из source/main.py (run_bot, run_async_bot или
+# run_process_bot) и подаёт поток событий с заданной частотой:
+#   • синтетический — смесь приветствий, нажатий кнопок (payload-ы берутся
+#     из настоящих клавиатур бота), свободного текста и мата;
+#   • записанный — JSON Lines с сырыми событиями longpoll/Callback API
+#     (повторяется по кругу, ID сообщений переписываются, чтобы их не
+#     отбросила дедупликация).
+# Задержка «от события до messages.send» считается по каждому сообщению:
+# ответы одному пользователю приходят по порядку, поэтому k-й ответ
+# пользователю сопоставляется с его k-м событием.
+# Запуск:  python -m source.loadtest --runner sync --rate 200 --events 2000
+# ---------------------------------------------------------------------
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from source.fake_vk import FAKE_GROUP_ID, FakeVkServer
+
+RUNNERS = ("sync", "async", "processes")
+DEFAULT_MIX = {"greeting": 0.2, "button": 0.5, "text": 0.2, "profanity": 0.1}
+
+GREETINGS = ["Привет", "привет!", "Начать", "/start", "ghbdtn", "Здравствуй"]
+FREE_TEXT = ["ИИ", "игра", "датасет", "мобильное приложение", "какие сроки у проектов",
+             "дадут ли сертификат", "что такое проект", "хочу проект по дизайну", "ghjtrns",
+             "как дела", "веб-разработка", "нейросеть для распознавания"]
+PROFANITY = ["ты блять", "хуйня какая-то", "пиздец", "сука"]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def collect_button_payloads(limit: int = 300) -> List[dict]:
+    """Payload-ы кнопок, до которых можно дойти от главного меню (обход в ширину)."""
+    from source.bot_logic import generate_keyboard_response
+
+    seen, result = set(), []
+    queue: Deque[Optional[str]] = deque([None])
+    while queue and len(result) < limit:
+        raw = queue.popleft()
+        payload = json.loads(raw) if raw else None
+        _, keyboard = generate_keyboard_response(0, "Привет" if payload is None else "", payload)
+        if payload is not None:
+            result.append(payload)
+        if not keyboard:
+            continue
+        for row in json.loads(keyboard)["buttons"]:
+            for button in row:
+                raw_payload = button["action"].get("payload")
+                if raw_payload and raw_payload not in seen:
+                    seen.add(raw_payload)
+                    queue.append(raw_payload)
+    return result
+
+
+def synthetic_stream(users: int, mix: Dict[str, float], seed: int = 1) -> Iterator[Dict[str, Any]]:
+    """Бесконечный поток {"user_id", "text", "payload"} в заданной пропорции."""
+    rng = random.Random(seed)
+    buttons = collect_button_payloads()
+    kinds, weights = zip(*mix.items())
+    while True:
+        kind = rng.choices(kinds, weights)[0]
+        user_id = 100_000 + rng.randrange(users)
+        if kind == "button":
+            yield {"user_id": user_id, "text": "", "payload": rng.choice(buttons)}
+        else:
+            pool = {"greeting": GREETINGS, "text": FREE_TEXT, "profanity": PROFANITY}[kind]
+            yield {"user_id": user_id, "text": rng.choice(pool), "payload": None}
+
+
+def recorded_stream(path: Path) -> Iterator[Dict[str, Any]]:
+    """Сырые события message_new из JSON Lines, по кругу."""
+    events = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    events = [e for e in events if e.get("type") == "message_new"]
+    if not events:
+        sys.exit(f"В {path} нет событий message_new")
+    while True:
+        for event in events:
+            message = event["object"]["message"]
+            payload = message.get("payload")
+            yield {"user_id": message["from_id"], "text": message.get("text", ""),
+                   "payload": json.loads(payload) if payload else None}
+
+
+def start_runner(runner: str) -> None:
+    """Запускает выбранный конвейер source/main.py в фоновом потоке."""
+    from source import main
+
+    target = {"sync": main.run_bot, "async": main.run_async_bot, "processes": main.run_process_bot}[runner]
+    threading.Thread(target=target, name=f"bot-{runner}", daemon=True).start()
+
+
+def run_load(fake: FakeVkServer,
+             stream: Iterator[Dict[str, Any]],
+             events: int,
+             rate: float,
+             timeout: float) -> Dict[str, Any]:
+    """Подаёт events событий с частотой rate (0 — без пауз) и ждёт все ответы."""
+    pushed_at: Dict[int, Deque[float]] = defaultdict(deque)
+    started = time.monotonic()
+    for i in range(events):
+        if rate > 0:
+            delay = started + i / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        item = next(stream)
+        pushed_at[item["user_id"]].append(time.monotonic())
+        fake.push_message(item["user_id"], item["text"], item["payload"])
+    push_elapsed = time.monotonic() - started
+
+    complete = fake.wait_sent(events, timeout)
+    latencies: List[float] = []
+    for sent in list(fake.sent):
+        queue = pushed_at.get(int(sent["peer_id"]))
+        if queue:
+            latencies.append((sent["sent_at"] - queue.popleft()) * 1000)
+    latencies.sort()
+    finished = max((s["sent_at"] for s in fake.sent), default=started)
+    return {
+        "events": events,
+        "replies": len(fake.sent),
+        "complete": complete,
+        "offered_rate": round(events / push_elapsed, 1) if push_elapsed else None,
+        "throughput": round(len(fake.sent) / (finished - started), 1) if finished > started else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "vk_calls": dict(fake.calls),
+        "throttled": fake.throttled,
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """'greeting=2,button=5' → доли по видам сообщений."""
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, spec.split(",")):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX:
+            sys.exit(f"Неизвестный вид сообщений: {kind}. Есть: {', '.join(DEFAULT_MIX)}")
+        mix[kind] = float(weight)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон source/main.py на фейковом VK API")
+    parser.add_argument("--runner", choices=RUNNERS, default="sync", help="какой конвейер запускать")
+    parser.add_argument("--events", type=int, default=1000, help="сколько сообщений подать")
+    parser.add_argument("--rate", type=float, default=200, help="сообщений в секунду (0 — сколько успеет)")
+    parser.add_argument("--users", type=int, default=200, help="сколько разных пользователей")
+    parser.add_argument("--mix", default="", help="доли видов сообщений, например greeting=1,button=3")
+    parser.add_argument("--record", type=Path, help="JSON Lines с записанными событиями вместо синтетики")
+    parser.add_argument("--latency", type=float, default=0.03, help="задержка execute/messages.send, сек")
+    parser.add_argument("--send-rps", type=float, default=20, help="лимит запросов к API в секунду (SEND_RPS)")
+    parser.add_argument("--json", type=Path, help="куда дополнительно записать результат")
+    args = parser.parse_args()
+
+    fake = FakeVkServer(send_latency=args.latency).start()
+    # Конфигурация читается при импорте source.config — задаём её до импорта бота
+    os.environ.setdefault("TOKEN", "fake-token")
+    os.environ["GROUP_ID"] = str(FAKE_GROUP_ID)
+    os.environ["VK_API_URL"] = fake.api_url
+    os.environ["SEND_RPS"] = str(args.send_rps)
+    os.environ["LONGPOLL_STATE_PATH"] = ""
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")      # логи на каждое сообщение исказили бы замер
+
+    stream = recorded_stream(args.record) if args.record else synthetic_stream(args.users, parse_mix(args.mix))
+    next(stream)                                        # payload-ы кнопок собираются до старта замера
+    start_runner(args.runner)
+    while fake.calls.get("groups.getLongPollServer", 0) == 0:
+        time.sleep(0.01)
+
+    result = run_load(fake, stream, args.events, args.rate,
+                      timeout=max(60.0, args.events / max(args.send_rps, 1)))
+    result["runner"] = args.runner
+    lat = result["latency_ms"]
+    print(f"runner={args.runner}  событий {result['events']}, ответов {result['replies']}"
+          f"{'' if result['complete'] else ' (не все!)'}")
+    print(f"подано {result['offered_rate']} сообщ./с, обработано {result['throughput']} сообщ./с")
+    print(f"задержка, мс: p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}")
+    if args.json:
+        args.json.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    fake.stop()
@@ -0,0 +1,170 @@
+# log_setup.py - неблокирующее логирование с выборкой и лимитом
+# ---------------------------------------------------------------------
+# Потоки обработки не пишут в консоль сами:
+#   • корневой логгер получает QueueHandler — запись кладётся в очередь,
+#     а форматирует и выводит её фоновый поток QueueListener;
+#   • сообщение (msg % args) собирается только в этом потоке и только для
+#     записей, прошедших фильтры, — отброшенные не стоят форматирования;
+#   • записи с extra={"category": …} проходят выборку (LOG_SAMPLE, доля
+#     0…1 на категорию), а всё ниже WARNING — общий лимит записей в секунду
+#     (LOG_RATE_LIMIT); сколько отброшено, видно в поле dropped следующей
+#     записи;
+#   • формат json — одна JSON-строка на запись с полями user_id, cmd,
+#     latency_ms и т.п. из extra; text — прежний человекочитаемый вид.
+# ---------------------------------------------------------------------
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+TEXT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+EXTRA_FIELDS = ("category", "user_id", "cmd", "latency_ms", "dropped")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid = 0          # процесс, в котором работает поток _listener
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """'message=0.1,reply=0.05' → {"message": 0.1, "reply": 0.05}."""
+    rates: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        category, _, rate = item.partition("=")
+        try:
+            rates[category.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            print(f"LOG_SAMPLE: пропущено «{item}»", file=sys.stderr)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей своей категории; WARNING и выше — всегда."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "category", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Не больше `rate` записей ниже WARNING в секунду (маркерная корзина)."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if record.levelno < logging.WARNING:
+                if self._tokens < 1:
+                    self._dropped += 1
+                    return False
+                self._tokens -= 1
+            if self._dropped:
+                record.dropped = self._dropped
+                self._dropped = 0
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который не форматирует запись в потоке вызова (стандартный
+    prepare() собирает msg % args сразу). Очередь — в том же процессе, так что
+    запись передаётся как есть; только трассировку исключения превращаем в
+    текст сразу, чтобы не держать кадры стека.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, TEXT_DATEFMT),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Прежний формат + отметка о пропущенных записях."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        dropped = getattr(record, "dropped", None)
+        return f"{line} [пропущено записей: {dropped}]" if dropped else line
+
+
+def setup_logging(level: str = "INFO",
+                  fmt: str = "json",
+                  sample: str = "",
+                  rate_limit: float = 0) -> None:
+    """
+    Настраивает корневой логгер. Можно вызывать повторно (например, в
+    процессе-воркере после fork): прежний обработчик очереди заменяется.
+    """
+    global _listener, _listener_pid
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()                               # после fork поток остался в родителе — не трогаем
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter(TEXT_FORMAT, TEXT_DATEFMT))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    rates = parse_sample_rates(sample)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    if rate_limit > 0:
+        handler.addFilter(RateLimitFilter(rate_limit))
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def stop_logging() -> None:
+    """Дописывает очередь и останавливает фоновый поток."""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,183 @@
+# longpoll.py - Bots Long Poll без пересоздания сессии при каждом сбое
+# ---------------------------------------------------------------------
+# В отличие от vk_api.VkBotLongPoll:
+#   • запросы a_check идут через общий пул соединений VkHttpClient;
+#   • failed 1 → берём ts из ответа, failed 2 → новый только key,
+#     failed 3 → новые key и ts (события за время сбоя потеряны);
+#   • сетевые ошибки и ошибки API — повтор с экспоненциальной паузой
+#     и джиттером (не больше BACKOFF_MAX), без пересоздания клиента;
+#   • последний обработанный ts сохраняется в файл, и после перезапуска
+#     бот продолжает с того же места, а не с «сейчас».
+# ---------------------------------------------------------------------
+import json
+import logging
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+from vk_api.bot_longpoll import VkBotEvent, VkBotLongPoll
+from vk_api.exceptions import ApiError
+
+from source.metrics import LONGPOLL_RECONNECTS
+from source.vk_http import VkHttpClient
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 0.5      # первая пауза после ошибки, сек
+BACKOFF_MAX = 30.0      # потолок паузы, сек
+
+
+def parse_event(raw_event: Dict[str, Any]) -> VkBotEvent:
+    """Сырое событие (longpoll или Callback API) → объект события vk_api."""
+    event_class = VkBotLongPoll.CLASS_BY_EVENT_TYPE.get(raw_event["type"], VkBotLongPoll.DEFAULT_EVENT_CLASS)
+    return event_class(raw_event)
+
+
+class Backoff:
+    """Экспоненциальная пауза с «полным» джиттером: random(0, min(max, base·2ⁿ))."""
+
+    def __init__(self, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX):
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+
+    def next_delay(self) -> float:
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** self.failures))
+        self.failures += 1
+        return delay
+
+    def reset(self) -> None:
+        self.failures = 0
+
+
+class LongPollClient:
+    """
+    Long Poll сообщества поверх VkHttpClient.
+    check() — один запрос (может поднять исключение), listen() — бесконечный
+    поток событий с повторами. После того как события пачки отданы
+    потребителю, их ts записывается в state_path (если задан).
+    """
+
+    def __init__(self,
+                 client: VkHttpClient,
+                 group_id: int,
+                 wait: int = 25,
+                 state_path: Optional[Path] = None):
+        self.client = client
+        self.group_id = group_id
+        self.wait = wait
+        self.state_path = state_path
+        self.backoff = Backoff()
+
+        self.server: Optional[str] = None
+        self.key: Optional[str] = None
+        self.ts: Optional[str] = self._load_ts()
+        self._saved_ts = self.ts
+        self._stop = threading.Event()
+
+    # -----------------------------------------------------------------
+    # Состояние (ts) на диске
+    # -----------------------------------------------------------------
+
+    def _load_ts(self) -> Optional[str]:
+        if self.state_path is None:
+            return None
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать {self.state_path.name}: {e}")
+            return None
+        if state.get("group_id") != self.group_id:
+            return None
+        logger.info(f"LongPoll продолжит с сохранённого ts={state.get('ts')}")
+        return state.get("ts")
+
+    def save_ts(self) -> None:
+        """Записывает текущий ts (атомарно, только если он изменился)."""
+        if self.state_path is None or self.ts is None or self.ts == self._saved_ts:
+            return
+        tmp = self.state_path.with_name(f".{self.state_path.name}.tmp")
+        try:
+            tmp.write_text(json.dumps({"group_id": self.group_id, "ts": self.ts}), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+            self._saved_ts = self.ts
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить ts longpoll: {e}")
+
+    # -----------------------------------------------------------------
+    # Запросы
+    # -----------------------------------------------------------------
+
+    def update_server(self, update_ts: bool = True, reason: str = "start") -> None:
+        """Новые server и key; ts — только если update_ts или его ещё нет."""
+        LONGPOLL_RECONNECTS.inc(reason)
+        response = self.client.method("groups.getLongPollServer", {"group_id": self.group_id})
+        self.server = response["server"]
+        self.key = response["key"]
+        if update_ts or self.ts is None:
+            self.ts = response["ts"]
+
+    def check(self) -> List[VkBotEvent]:
+        """Один запрос a_check. Сетевые ошибки и ApiError пробрасываются."""
+        if self.key is None:                        # первый запрос или после ошибки
+            self.update_server(update_ts=False, reason="start" if self.server is None else "error")
+        response: Dict[str, Any] = self.client.http.get(
+            self.server,
+            params={"act": "a_check", "key": self.key, "ts": self.ts, "wait": self.wait},
+            timeout=self.wait + 10,
+        ).json()
+
+        failed = response.get("failed")
+        if failed is None:
+            self.ts = response["ts"]
+            events = []
+            for raw in response.get("updates", []):
+                try:
+                    events.append(parse_event(raw))
+                except Exception as e:              # одно кривое событие не теряет всю пачку
+                    logger.exception("LongPoll: не удалось разобрать событие %.200s: %s", raw, e)
+            return events
+        if failed == 1:
+            LONGPOLL_RECONNECTS.inc("ts_outdated")
+            logger.warning(f"LongPoll: история событий устарела, продолжаем с ts={response.get('ts')}")
+            self.ts = response["ts"]
+        elif failed == 2:
+            self.update_server(update_ts=False, reason="key_expired")
+        elif failed == 3:
+            logger.warning("LongPoll: информация утеряна, получаем новые key и ts")
+            self.update_server(update_ts=True, reason="history_lost")
+        else:
+            raise ValueError(f"Неизвестный ответ longpoll: {response}")
+        return []
+
+    def failure_delay(self, error: Exception) -> float:
+        """Пауза перед повтором после ошибки; ошибка API — ещё и повод взять новый key."""
+        if isinstance(error, ApiError):
+            self.key = None
+        delay = self.backoff.next_delay()
+        logger.error(f"LongPoll error: {error}, повтор через {delay:.1f} сек…")
+        return delay
+
+    def listen(self) -> Iterator[VkBotEvent]:
+        """События одно за другим, пока не вызван stop()."""
+        while not self._stop.is_set():
+            try:
+                events = self.check()
+            except (requests.RequestException, ApiError, ValueError, KeyError) as e:
+                self._stop.wait(self.failure_delay(e))
+                continue
+            except Exception as e:                  # непредвиденное — со стеком, но цикл не бросаем
+                logger.exception("LongPoll: непредвиденная ошибка: %s", e)
+                self._stop.wait(self.failure_delay(e))
+                continue
+            self.backoff.reset()
+            yield from events
+            self.save_ts()                          # пачка передана дальше
+
+    def stop(self) -> None:
+        self._stop.set()
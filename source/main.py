@@ -1,121 +1,196 @@
 # main.py
-import json                               # Работа с JSON-строкой payload-а
 import logging                            # Логирование событий
-import time                               # Пауза между переподключениями
+import signal                             # Ctrl+C обрабатывает только главный процесс
+from datetime import datetime             # Первый запуск парсера — сразу
+from concurrent.futures import Future     # Результат отложенной отправки
+from functools import partial             # Привязка аргументов к обработчикам
+from pathlib import Path                  # Путь к файлу состояния longpoll
 
-import vk_api                             # Основная библиотека для VK API
-from vk_api.bot_longpoll import (         # Модуль LongPoll для сообществ
-    VkBotLongPoll,
-    VkBotEventType,
-)
-from vk_api.utils import get_random_id    # Генерация random_id для сообщений
 from vk_api.exceptions import ApiError    # Исключения VK API
-
-from source.config import TOKEN, GROUP_ID        # Токен сообщества и его ID
-from source.bot_logic import generate_keyboard_response      # Бизнес-логика ответа
-from source.bot_data import ERROR_FALLBACK_MESSAGE           # Запасной ответ при ошибке
+from apscheduler.schedulers.background import BackgroundScheduler  # Фоновые задачи по расписанию
+
+from source.config import (                                  # Токен, ID сообщества, режим запуска
+    TOKEN,
+    GROUP_ID,
+    BOT_RUNNER,
+    WORKER_COUNT,
+    PROCESS_COUNT,
+    SEND_RPS,
+    EVENT_QUEUE_SIZE,
+    KB_RELOAD_INTERVAL,
+    PARSER_INTERVAL_HOURS,
+    LONGPOLL_STATE_PATH,
+    METRICS_HOST,
+    METRICS_PORT,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_SAMPLE,
+    LOG_RATE_LIMIT,
+)
+from source.bot_logic import KNOWLEDGE                       # Текущий снимок базы знаний
+from source.dispatch import build_reply, EVENT_DEDUP         # Событие → параметры messages.send
+from source.async_runner import run_async_bot                # asyncio-вариант основного цикла
+from source.callback_server import run_callback_bot          # Приём событий через Callback API
+from source.vk_http import VkHttpClient                      # HTTP-клиент VK API с пулом соединений
+from source.longpoll import LongPollClient, parse_event      # LongPoll с повторами и сохранением ts
+from source.bot_data import bad_words_matcher                # Автомат фильтра мата (грузим до fork)
+from source.process_pool import ShardedProcessPool           # Процессы-воркеры с шардированием по user_id
+from source.metrics import QUEUE_DEPTH, start_metrics_server  # GET /metrics
+from source.log_setup import setup_logging                   # Логи через фоновую очередь
+from source.sender import BatchSender                        # Пакетная отправка с лимитом запросов/с
+from source.worker_pool import ShardedWorkerPool             # Очередь + воркеры с порядком по user_id
 
 # ------------------------------------------------------------------------------
-# Функция автоматического обновления данных в базе (ПОКА ОТКЛЮЧЕНА)
+# Настраиваем логирование: запись уходит в очередь, в консоль её выводит
+# фоновый поток (JSON-строки или текст, с выборкой и лимитом записей/с)
 # ------------------------------------------------------------------------------
-
-# from apscheduler.schedulers.background import BackgroundScheduler
-# from source.projects_parser import parse_and_save_data
-# sched = BackgroundScheduler()
-# sched.add_job(parse_and_save_data, "interval", hours=12)
-# sched.start()
-# parse_and_save_data()
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE, LOG_RATE_LIMIT)
+logger = logging.getLogger(__name__)      # Логгер для текущего модуля
 
 # ------------------------------------------------------------------------------
-# Настраиваем логирование: вывод в консоль с датой и уровнем
+# Автоматическое обновление базы знаний
 # ------------------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,                   # Уровень логирования (DEBUG/INFO/…)
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
-logger = logging.getLogger(__name__)      # Логгер для текущего модуля
+
+
+def _parse_and_reload() -> None:
+    """Парсер Тильды → knowledge_base.json → новый снимок данных."""
+    from source.projects_parser import parse_and_save_data   # Импортируем, только если парсер включён
+    parse_and_save_data()
+    KNOWLEDGE.refresh()
+
+
+def start_knowledge_refresh(run_parser: bool = True) -> BackgroundScheduler:
+    """
+    Фоновый планировщик: следит за data/*.json и (если задан
+    PARSER_INTERVAL_HOURS и run_parser) периодически запускает парсер. Новый
+    снимок подменяется атомарно — обработка сообщений при этом не прерывается.
+    """
+    sched = BackgroundScheduler(daemon=True)
+    sched.add_job(KNOWLEDGE.refresh, "interval", seconds=KB_RELOAD_INTERVAL,
+                  max_instances=1, coalesce=True)
+    if run_parser and PARSER_INTERVAL_HOURS > 0:
+        sched.add_job(_parse_and_reload, "interval", hours=PARSER_INTERVAL_HOURS,
+                      next_run_time=datetime.now(), max_instances=1, coalesce=True)
+    sched.start()
+    return sched
 
 # ------------------------------------------------------------------------------
 # Основной цикл работы бота
 # ------------------------------------------------------------------------------
 
 
+def _log_sent(params: dict, future: Future) -> None:
+    """Итог отправки одного сообщения (вызывается потоком отправителя)."""
+    try:
+        future.result()
+        # ----------- ЛОГ — исходящее сообщение (успешно отправлено) ----------
+        logger.info(
+            "Бот ответил пользователю %s: '%.60s'", params["peer_id"], params["message"],
+            extra={"category": "reply", "user_id": params["peer_id"]},
+        )
+    except ApiError as e:                                     # Ошибка VK API
+        logger.error("VK ApiError при отправке: %s", e)
+    except Exception as e:                                    # Сеть, таймаут и т.п.
+        logger.error("Ошибка при отправке сообщения пользователю %s: %s", params["peer_id"], e)
+
+
+def _process_event(sender: BatchSender, event) -> None:
+    """Обработка одного события в потоке воркера: ответ + постановка в отправку."""
+    params = build_reply(event)                               # Разбор события + бизнес-логика
+    if params is None:                                        # Отвечать не нужно
+        return
+    future = sender.submit(params)                            # Уйдёт в ближайшем execute
+    future.add_done_callback(partial(_log_sent, params))
+
+
 def run_bot() -> None:
     logger.info("Запускаем бота VK Education…")               # Стартовое сообщение
-    logger.info("Успешное подключение к VK API")              # Подтверждаем коннект
-    while True:                                               # Цикл перезапуска при ошибках
-        try:
-            vk_session = vk_api.VkApi(token=TOKEN)  # Создаём VK-сессию
-            vk = vk_session.get_api()  # Высокоуровневый доступ
-            longpoll = VkBotLongPoll(vk_session, group_id=GROUP_ID)  # Инициализируем longpoll
-            logger.info("LongPoll запущен заново")
-
-            for event in longpoll.listen():                   # Слушаем события VK
-                if event.type != VkBotEventType.MESSAGE_NEW:  # Нас интересуют только новые сообщения
-                    continue
-                if not event.from_user:                       # Игнорируем сообщения из чатов/ботов
-                    continue
-
-                msg = event.message                           # Объект сообщения
-                user_id = msg.from_id                         # ID пользователя
-                raw_text = (msg.text or "").strip()           # Текст сообщения
-
-                payload = None                                # Значение payload по умолчанию
-                if msg.payload:                               # Если payload присутствует
-                    try:
-                        payload = json.loads(msg.payload)     # Пытаемся распарсить payload как JSON
-                    except json.JSONDecodeError:
-                        logger.warning(                       # Логируем ошибку парсинга payload
-                            f"Не удалось распарсить payload: {msg.payload}"
-                        )
-
-                # ----------------------- ЛОГ — входящее сообщение -----------------------
-                logger.info(
-                    f"Пользователь {user_id} прислал: '{raw_text}' | payload={payload}"
-                )
-
-                if not raw_text and not payload:              # Если сообщение пустое и без payload
-                    continue                                   # Пропускаем
-
-                # ----------------------- ВЫЗОВ БИЗНЕС-ЛОГИКИ ---------------------------
-                try:
-                    response_text, keyboard_json = generate_keyboard_response(
-                        user_id=user_id,
-                        text=raw_text,
-                        payload=payload,
-                    )
-                except Exception as e:                        # Ловим ошибки логики
-                    logger.exception(                         # Пишем стек-трейс
-                        "Ошибка в generate_keyboard_response: %s", e
-                    )
-                    response_text, keyboard_json = ERROR_FALLBACK_MESSAGE, None
-
-                if not response_text:                         # Если ответ пустой — ничего не шлём
-                    continue
-
-                params = {                                    # Параметры метода messages.send
-                    "peer_id": user_id,                       # Адресат
-                    "message": response_text,                 # Текст ответа
-                    "random_id": get_random_id(),             # Случайный ID для уникальности
-                }
-
-                if keyboard_json:                             # При наличии клавиатуры
-                    params["keyboard"] = keyboard_json        # Добавляем её в параметры
-
-                try:
-                    vk.messages.send(**params)                # Отправляем сообщение
-                    # ----------- ЛОГ — исходящее сообщение (успешно отправлено) ----------
-                    logger.info(
-                        f"Бот ответил пользователю {user_id}: '{response_text[:60]}'"
-                    )
-                except ApiError as e:                         # Ошибка VK API
-                    logger.error("VK ApiError при отправке: %s", e)
-        except Exception as e:                                # Любая критическая ошибка цикла
-            logger.error(                                     # Логируем и ждём 5 сек
-                "LongPoll error: %s, перезапуск через 5 сек…", e
-            )
-            time.sleep(5)                                     # Пауза перед повтором
+    client = VkHttpClient(TOKEN, pool_size=WORKER_COUNT)      # Один пул соединений на все потоки
+    sender = BatchSender(client).start()                      # Пачки messages.send через execute
+    pool = ShardedWorkerPool(                                 # Воркеры: ответ + постановка в отправку
+        partial(_process_event, sender),
+        workers=WORKER_COUNT,
+        queue_size=EVENT_QUEUE_SIZE,
+    ).start()
+    QUEUE_DEPTH.set_function(pool.qsize, "events")            # Глубина очередей — в /metrics
+    QUEUE_DEPTH.set_function(sender.qsize, "send")
+    longpoll = LongPollClient(                                # Та же сессия, повторы с паузой внутри
+        client,
+        GROUP_ID,
+        state_path=Path(LONGPOLL_STATE_PATH) if LONGPOLL_STATE_PATH else None,
+    )
+    logger.info("LongPoll запущен")
+    try:
+        for event in longpoll.listen():                       # Слушаем события VK
+            try:
+                user_id = event.message.get("from_id", 0) if event.message else 0
+                pool.submit(user_id, event)                   # Блокируется, если очередь полна
+            except Exception as e:                            # Одно событие не роняет весь цикл
+                logger.exception("Не удалось принять событие %s: %s", event.type, e)
+    finally:
+        pool.stop(timeout=10)                                 # Дорабатываем принятые события
+        sender.stop(timeout=10)                               # И досылаем готовые ответы
+        logger.info(f"Дедупликация событий: {EVENT_DEDUP.stats()}")
+
+# ------------------------------------------------------------------------------
+# Многопроцессный режим: longpoll в главном процессе, ответы — в воркерах
+# ------------------------------------------------------------------------------
+
+
+def _shard_worker(index: int, events) -> None:
+    """Процесс-воркер: сырые события своего шарда → ответ → отправка."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)              # Останавливает главный процесс
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE, LOG_RATE_LIMIT)  # Поток вывода логов не пережил fork
+    scheduler = start_knowledge_refresh(run_parser=False)     # Парсер запускает только главный
+    client = VkHttpClient(TOKEN, pool_size=2)                 # Своё соединение у каждого процесса
+    sender = BatchSender(client, rate=SEND_RPS / PROCESS_COUNT).start()  # Общий лимит делим поровну
+    QUEUE_DEPTH.set_function(sender.qsize, "send")
+    if METRICS_PORT:                                          # Свой /metrics у каждого процесса
+        start_metrics_server(METRICS_PORT + 1 + index, METRICS_HOST)
+    logger.info(f"Воркер {index} запущен")
+    try:
+        while True:
+            raw_event = events.get()
+            if raw_event is None:                             # Маркер остановки
+                break
+            try:
+                _process_event(sender, parse_event(raw_event))
+            except Exception as e:
+                logger.exception("Ошибка в воркере %s при обработке события: %s", index, e)
+    finally:
+        sender.stop(timeout=10)                               # Досылаем готовые ответы
+        scheduler.shutdown(wait=False)
+        logger.info(f"Воркер {index} остановлен, дедупликация: {EVENT_DEDUP.stats()}")
+
+
+def run_process_bot() -> None:
+    logger.info("Запускаем бота VK Education (%s процессов)…", PROCESS_COUNT)
+    bad_words_matcher()                                       # База знаний уже загружена импортом,
+    pool = ShardedProcessPool(                                # автомат грузим сами — всё до fork
+        _shard_worker,
+        processes=PROCESS_COUNT,
+        queue_size=EVENT_QUEUE_SIZE,
+    ).start()
+    scheduler = start_knowledge_refresh()                     # Потоки главного процесса — после fork
+    QUEUE_DEPTH.set_function(pool.qsize, "events")
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT, METRICS_HOST)
+    longpoll = LongPollClient(
+        VkHttpClient(TOKEN, pool_size=1),
+        GROUP_ID,
+        state_path=Path(LONGPOLL_STATE_PATH) if LONGPOLL_STATE_PATH else None,
+    )
+    logger.info("LongPoll запущен")
+    try:
+        for event in longpoll.listen():
+            try:
+                user_id = event.message.get("from_id", 0) if event.message else 0
+                pool.submit(user_id, event.raw)               # Процессу уходит сырой dict
+            except Exception as e:                            # Одно событие не роняет весь цикл
+                logger.exception("Не удалось принять событие %s: %s", event.type, e)
+    finally:
+        pool.stop(timeout=15)
+        scheduler.shutdown(wait=False)
 
 # ------------------------------------------------------------------------------
 # Точка входа
@@ -123,9 +198,24 @@ def run_bot() -> None:
 
 
 if __name__ == "__main__":
+    scheduler = None
+    if BOT_RUNNER != "processes":                             # Там потоки стартуют после fork
+        if METRICS_PORT:
+            start_metrics_server(METRICS_PORT, METRICS_HOST)  # Метрики для Prometheus
+        scheduler = start_knowledge_refresh()                 # Обновление базы в фоне
     try:
-        run_bot()                                             # Запускаем бота
+        if BOT_RUNNER == "async":                             # asyncio-раннер с параллельной отправкой
+            run_async_bot()
+        elif BOT_RUNNER == "callback":                        # VK сам присылает события на наш сервер
+            run_callback_bot()
+        elif BOT_RUNNER == "processes":                       # Ответы строят процессы-воркеры
+            run_process_bot()
+        else:
+            run_bot()                                         # Запускаем бота
     except KeyboardInterrupt:                                 # Корректная остановка Ctrl+C
         logger.info("Бот остановлен по Ctrl+C")
+    finally:
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
 # a
 
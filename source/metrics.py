@@ -0,0 +1,234 @@
+# metrics.py - счётчики и гистограммы в формате Prometheus
+# ---------------------------------------------------------------------
+# Небольшой реестр без внешних зависимостей:
+#   Counter   — inc(*метки);
+#   Histogram — observe(сек, *метки) или timed(*метки) как декоратор;
+#   Gauge     — значение считается функцией в момент сбора (длина очереди).
+# Запись — словарь + короткий lock, поэтому на горячем пути стоит
+# единицы микросекунд. start_metrics_server() отдаёт всё по GET /metrics
+# в текстовом формате Prometheus.
+# Метрики горячего пути объявлены внизу модуля.
+# ---------------------------------------------------------------------
+import bisect
+import functools
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # метки → [счётчики по корзинам (последняя — +Inf), сумма]
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, *labelvalues: str) -> int:
+        entry = self._values.get(labelvalues)
+        return sum(entry[0]) if entry else 0
+
+    def timed(self, *labelvalues: str):
+        """Декоратор: время каждого вызова функции."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labelvalues)
+            return wrapper
+        return decorator
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Значения вычисляются функциями при сборе: set_function(fn, *метки)."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set_function(self, func: Callable[[], float], *labelvalues: str) -> None:
+        with self._lock:
+            self._functions[labelvalues] = func
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._functions.items())
+        lines = []
+        for key, func in items:
+            try:
+                value = func()
+            except Exception as e:                       # сбор метрик не должен падать
+                logger.warning(f"Gauge {self.name}{key}: {e}")
+                continue
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.header()
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def start_metrics_server(port: int,
+                         host: str = "127.0.0.1",
+                         registry: Registry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """HTTP-сервер с GET /metrics в фоновом потоке; None — если порт занят."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):         # каждый сбор метрик в лог не пишем
+            pass
+
+    try:
+        httpd = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        logger.error(f"Не удалось открыть /metrics на {host}:{port}: {e}")
+        return None
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Метрики: http://{host}:{httpd.server_address[1]}/metrics")
+    return httpd
+
+
+# ---------------------------------------------------------------------
+# Метрики бота
+# ---------------------------------------------------------------------
+
+EVENTS_RECEIVED = REGISTRY.register(Counter(
+    "bot_events_received_total", "Полученные события по типу", ["type"]))
+EVENTS_DUPLICATE = REGISTRY.register(Counter(
+    "bot_events_duplicate_total", "Повторно доставленные события, пропущенные дедупликацией"))
+COMMAND_SECONDS = REGISTRY.register(Histogram(
+    "bot_command_seconds", "Время построения ответа по команде (text — свободный текст)", ["cmd"]))
+COMMAND_ERRORS = REGISTRY.register(Counter(
+    "bot_command_errors_total",
+    "Ошибки команд: unknown — неизвестная cmd, invalid — payload не прошёл схему, exception — исключение",
+    ["cmd", "kind"]))
+KEYBOARD_SECONDS = REGISTRY.register(Histogram(
+    "bot_keyboard_build_seconds", "Время сборки клавиатуры", ["keyboard"]))
+VK_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "vk_request_seconds", "Длительность запросов к VK API", ["method"]))
+VK_API_ERRORS = REGISTRY.register(Counter(
+    "vk_api_errors_total", "Ошибки VK API по методу и коду", ["method", "code"]))
+LONGPOLL_RECONNECTS = REGISTRY.register(Counter(
+    "longpoll_reconnects_total", "Переподключения longpoll по причине", ["reason"]))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "bot_queue_depth", "Событий или ответов в очереди", ["queue"]))
@@ -0,0 +1,130 @@
+# payload.py - компактная кодировка payload-а кнопок
+# ---------------------------------------------------------------------
+# Раньше каждая кнопка несла JSON вида
+#   {"cmd": "project_details", "depth": 3, "data": {"title": "<название>", …}}
+# и длинные названия упирались в лимит VK на payload (255 символов).
+# Компактный формат (версия 1):
+#   {"c":[1,"pd",3,<page>,<id>,<direction>,<duration>,<value>,<q>]}
+# — версия, короткий код команды, depth и поля data по позициям (хвостовые
+# пустые отбрасываются). Проект передаётся числовым ID из ProjectStore,
+# направление/длительность — числовым ID значения (facet_id).
+# decode_payload() понимает и компактный, и старый формат, поэтому кнопки
+# из уже отправленных сообщений продолжают работать.
+# ---------------------------------------------------------------------
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+from source.router import PayloadError
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_VERSION = 1
+COMPACT_PAYLOADS = True   # False — кнопки в старом формате (для сравнения и отката)
+
+CMD_CODES = {
+    "go_home": "h",
+    "go_back": "b",
+    "menu_find": "f",
+    "menu_faq": "q",
+    "menu_help": "?",
+    "faq_page": "qp",
+    "faq_answer": "qa",
+    "find_all_projects": "a",
+    "find_by_direction": "fd",
+    "find_by_duration": "ft",
+    "direction_selected": "ds",
+    "duration_selected": "ts",
+    "projects_page": "pp",
+    "search_page": "sp",
+    "project_details": "pd",
+}
+_CMD_BY_CODE = {code: cmd for cmd, code in CMD_CODES.items()}
+
+SLOTS = ("page", "id", "direction", "duration", "value", "q")   # порядок полей data
+FACET_SLOTS = frozenset({"direction", "duration", "value"})
+_FACET_MASK = 0xFFFFF     # до 7 цифр; на десяток значений коллизия практически исключена
+
+
+def facet_id(value: str) -> int:
+    """Числовой ID значения фильтра; зависит только от текста, поэтому стабилен."""
+    return zlib.crc32(value.encode("utf-8")) & _FACET_MASK
+
+
+def facet_table(values: Iterable[str]) -> Dict[int, str]:
+    """facet_id → значение для всех известных направлений и длительностей."""
+    table: Dict[int, str] = {}
+    for value in values:
+        if not value:
+            continue
+        fid = facet_id(value)
+        if table.get(fid, value) != value:
+            logger.error(f"Коллизия facet_id {fid}: «{table[fid]}» и «{value}»")
+        table.setdefault(fid, value)
+    return table
+
+
+def encode_payload(cmd: str,
+                   depth: int,
+                   data: Optional[Dict[str, Any]] = None,
+                   compact: Optional[bool] = None) -> str:
+    """Payload кнопки. Если команду или поля нельзя упаковать — старый формат."""
+    if compact is None:
+        compact = COMPACT_PAYLOADS
+    code = CMD_CODES.get(cmd)
+    if not compact or code is None or (data and not set(data) <= set(SLOTS)):
+        payload: Dict[str, Any] = {"cmd": cmd, "depth": depth}
+        if data:
+            payload["data"] = data
+        return json.dumps(payload, ensure_ascii=False)
+
+    fields = [PAYLOAD_VERSION, code, depth]
+    for slot in SLOTS:
+        value = (data or {}).get(slot)
+        if slot in FACET_SLOTS and isinstance(value, str) and value:
+            value = facet_id(value)
+        fields.append(value)
+    while fields[-1] is None:
+        fields.pop()
+    return json.dumps({"c": fields}, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_payload(payload: Any) -> Any:
+    """
+    Разобранный JSON payload-а → dict в старом формате {"cmd", "depth", "data"}.
+    Facet-поля остаются числами (их раскрывает resolve_facets по снимку данных).
+    Старый формат и чужие payload-ы возвращаются как есть, компактный
+    неизвестной версии — None.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("c"), list):
+        return payload
+    fields = payload["c"]
+    # код команды из чужого payload-а может быть чем угодно, в т.ч. списком
+    if (len(fields) < 3 or fields[0] != PAYLOAD_VERSION
+            or not isinstance(fields[1], (str, int)) or fields[1] not in _CMD_BY_CODE):
+        logger.warning(f"Неизвестный компактный payload: {payload}")
+        return None
+    decoded: Dict[str, Any] = {"cmd": _CMD_BY_CODE[fields[1]], "depth": fields[2]}
+    data = {slot: value for slot, value in zip(SLOTS, fields[3:]) if value is not None}
+    if data:
+        decoded["data"] = data
+    return decoded
+
+
+def resolve_facets(data: Dict[str, Any], facets: Dict[int, str]) -> Dict[str, Any]:
+    """
+    Подставляет текст направлений/длительностей вместо их facet_id.
+    Неизвестный ID (кнопка до обновления базы или подделанный payload) —
+    PayloadError: иначе фильтр молча превратился бы в «все проекты».
+    """
+    if not any(isinstance(data.get(slot), int) for slot in FACET_SLOTS):
+        return data
+    resolved = dict(data)
+    for slot in FACET_SLOTS:
+        value = data.get(slot)
+        if isinstance(value, int):
+            if value not in facets:
+                raise PayloadError(f"{slot}: неизвестное значение фильтра {value}")
+            resolved[slot] = facets[value]
+    return resolved
@@ -0,0 +1,101 @@
+# preprocess.py - однократная предобработка текста входящего сообщения
+# ---------------------------------------------------------------------
+# preprocess(text) за один вызов готовит всё, что нужно этапам ответа:
+#   normalized      — для приветствий и заголовка поиска;
+#   terms           — основы слов (как в индексе) для FAQ и поиска;
+#   query           — текст запроса для payload-а кнопок поиска (не длиннее
+#                     MAX_QUERY_LEN, по границе слова); ищем же по terms
+#                     всего сообщения;
+#   profanity_text  — текст, нормализованный фильтром мата;
+#   layout          — тот же текст, набранный в другой раскладке
+#                     («ghbdtn» → «привет», «ыефке» → «start»).
+# Дальше ни один этап не разбирает исходную строку заново.
+# ---------------------------------------------------------------------
+import re
+from typing import NamedTuple, Tuple
+
+from source import profanity
+from source.search import tokenize
+
+MAX_QUERY_LEN = 30       # запрос уходит в payload кнопок поиска, держим его коротким
+
+_JUNK_RE = re.compile(r"[^\w\sа-яё\-]")
+_SPACES_RE = re.compile(r"\s{2,}")
+
+# Клавиши QWERTY ↔ ЙЦУКЕН (нижний регистр)
+_EN_KEYS = "`qwertyuiop[]asdfghjkl;'zxcvbnm,."
+_RU_KEYS = "ёйцукенгшщзхъфывапролджэячсмитьбю"
+_EN_TO_RU = str.maketrans(_EN_KEYS, _RU_KEYS)
+_RU_TO_EN = str.maketrans(_RU_KEYS, _EN_KEYS)
+_LATIN_RE = re.compile(r"[a-z]")
+_CYRILLIC_RE = re.compile(r"[а-яё]")
+_RU_TO_EN_MAX_LEN = 20   # RU→EN нужен только коротким командам вроде «ыефке»
+
+
+class Preprocessed(NamedTuple):
+    """Результат предобработки одного сообщения."""
+    raw: str
+    normalized: str
+    terms: Tuple[str, ...]
+    query: str                      # normalized, укороченный по словам до MAX_QUERY_LEN
+    profanity_text: str
+    layout: str                     # текст в другой раскладке ("" — смешанный текст)
+    layout_to_ru: bool              # layout получен из латиницы (частая ошибка раскладки)
+
+
+def normalize(text: str) -> str:
+    """Приводим строку к нижнему регистру и убираем лишние символы"""
+    text = _JUNK_RE.sub(" ", text.lower())  # всё, кроме букв/цифр/дефиса → пробел
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def shorten_query(normalized: str) -> str:
+    """
+    Запрос для payload-а кнопок поиска: не длиннее MAX_QUERY_LEN. Длинный
+    текст сначала теряет слова без терминов (стоп-слова), затем режется по
+    границе слова — чтобы следующие страницы искали по тем же терминам.
+    """
+    if len(normalized) <= MAX_QUERY_LEN:
+        return normalized
+    query = ""
+    for word in normalized.split(" "):
+        if not tokenize(word):
+            continue
+        candidate = f"{query} {word}" if query else word
+        if len(candidate) > MAX_QUERY_LEN:
+            return query or word[:MAX_QUERY_LEN]    # первое же слово длиннее лимита
+        query = candidate
+    return query or normalized[:MAX_QUERY_LEN].rsplit(" ", 1)[0]
+
+
+def switch_layout(lowered: str) -> Tuple[str, bool]:
+    """
+    Перенабирает текст в другой раскладке, если он целиком в одной
+    (кириллицу — только короткий). Возвращает (текст, True если результат —
+    кириллица) или ("", False).
+    """
+    has_cyrillic = _CYRILLIC_RE.search(lowered) is not None
+    has_latin = _LATIN_RE.search(lowered) is not None
+    if has_latin == has_cyrillic:                # нет букв или смесь алфавитов
+        return "", False
+    if has_latin:
+        return lowered.translate(_EN_TO_RU), True
+    if len(lowered) > _RU_TO_EN_MAX_LEN:
+        return "", False
+    return lowered.translate(_RU_TO_EN), False
+
+
+def preprocess(text: str) -> Preprocessed:
+    lowered = text.lower()
+    normalized = normalize(lowered)
+    terms = tuple(tokenize(normalized))
+    switched, to_ru = switch_layout(lowered)
+    return Preprocessed(
+        raw=text,
+        normalized=normalized,
+        terms=terms,
+        query=shorten_query(normalized),
+        profanity_text=profanity.normalize(lowered),
+        layout=normalize(switched) if switched else "",
+        layout_to_ru=to_ru,
+    )
@@ -0,0 +1,111 @@
+# process_pool.py - шардирование событий по процессам-воркерам
+# ---------------------------------------------------------------------
+# Многопроцессный аналог ShardedWorkerPool: один процесс (supervisor)
+# читает longpoll и раскладывает сырые события по очередям multiprocessing,
+# N процессов-воркеров строят ответы и отправляют их. GIL больше не
+# ограничивает генерацию ответов одним ядром.
+#   • воркер выбирается как user_id % N → сообщения одного пользователя
+#     обрабатывает один процесс строго по порядку;
+#   • очереди ограничены, submit() блокируется → backpressure, как в потоках;
+#   • процессы стартуют через fork: данные, загруженные до start()
+#     (снимок базы знаний, автомат фильтра мата), воркеры получают общими
+#     страницами памяти; gc.freeze() не даёт сборщику мусора их «трогать»;
+#   • упавший воркер перезапускается (с новой очередью) при следующем
+#     событии для его шарда.
+# ---------------------------------------------------------------------
+import gc
+import logging
+import multiprocessing
+import queue
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = None  # маркер завершения для воркера (события — всегда dict)
+
+
+class ShardedProcessPool:
+    """
+    Пул из `processes` процессов. worker_main(index, queue) выполняется в
+    дочернем процессе и читает события из queue до маркера None.
+    """
+
+    def __init__(self,
+                 worker_main: Callable[[int, Any], None],
+                 processes: int = 2,
+                 queue_size: int = 256,
+                 start_method: Optional[str] = None):
+        self.worker_main = worker_main
+        self.processes = max(processes, 1)
+        if start_method is None:                      # fork — ради общих страниц памяти
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(start_method)
+        self._per_worker = max(queue_size // self.processes, 1)
+        self._queues: List[Any] = [self._ctx.Queue(maxsize=self._per_worker) for _ in range(self.processes)]
+        self._procs: List[Any] = [None] * self.processes
+        self._started = False
+        self._saturated = False
+        self.restarts = 0
+
+    def _spawn(self, index: int) -> None:
+        proc = self._ctx.Process(
+            target=self.worker_main,
+            args=(index, self._queues[index]),
+            name=f"bot-shard-{index}",
+            daemon=True,
+        )
+        proc.start()
+        self._procs[index] = proc
+
+    def start(self) -> "ShardedProcessPool":
+        if not self._started:
+            gc.collect()
+            gc.freeze()                                # общие объекты — в постоянное поколение
+            for i in range(self.processes):
+                self._spawn(i)
+            gc.unfreeze()
+            self._started = True
+            logger.info(f"Запущено процессов-воркеров: {self.processes}")
+        return self
+
+    def submit(self, key: int, item: Any) -> None:
+        """
+        Ставит item (picklable) в очередь процесса, отвечающего за key.
+        Блокируется, пока в этой очереди не появится место.
+        """
+        index = hash(key) % self.processes
+        proc = self._procs[index]
+        if proc is not None and not proc.is_alive():
+            # упавший процесс мог держать блокировку очереди — заменяем её,
+            # необработанные события шарда при этом теряются
+            logger.error(f"Воркер {proc.name} завершился с кодом {proc.exitcode}, перезапускаем")
+            self.restarts += 1
+            self._queues[index].cancel_join_thread()
+            self._queues[index] = self._ctx.Queue(maxsize=self._per_worker)
+            self._spawn(index)
+        q = self._queues[index]
+        try:
+            q.put_nowait(item)
+            self._saturated = False
+        except queue.Full:
+            if not self._saturated:                       # пишем один раз на эпизод перегрузки
+                logger.warning("Очередь процесса %s переполнена, ждём воркер…", index)
+                self._saturated = True
+            q.put(item)
+
+    def qsize(self) -> int:
+        """Сколько событий ждут обработки (приблизительно; на macOS недоступно)."""
+        return sum(q.qsize() for q in self._queues)
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Дожидается обработки уже принятых событий и останавливает процессы."""
+        if not self._started:
+            return
+        for q in self._queues:
+            q.put(_STOP)
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                logger.warning(f"Воркер {proc.name} не завершился за {timeout} сек, останавливаем")
+                proc.terminate()
+        self._started = False
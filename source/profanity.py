@@ -0,0 +1,253 @@
+# profanity.py - поиск ненормативной лексики автоматом Ахо–Корасик
+# ---------------------------------------------------------------------
+# Текст сначала нормализуется (нижний регистр, латиница/цифры-двойники →
+# кириллица в словах, где кириллица уже есть, «х*у*й»/«х-у-й» → «хуй»,
+# повторы букв схлопываются), затем проходится автоматом ровно один раз —
+# время O(длина текста) независимо от размера словаря.
+#
+# У каждого шаблона свой режим:
+#   TOKEN  — совпадает только целое слово (все слова из Bad_Words_List.txt);
+#   PREFIX — корень в начале слова, в т.ч. после приставки («на», «за», …);
+#   ANY    — корень в любом месте слова (только корни без «мирных» омонимов).
+# Слова, которые начинаются с корня из INNOCENT_STEMS («скипидар», «спидран»),
+# не считаются матом, даже если в них нашёлся шаблон.
+# python -m source.profanity — самопроверка на SELF_CHECK_BAD/SELF_CHECK_CLEAN.
+#
+# Собранный автомат сохраняется в data/ (load_or_build) вместе с
+# отпечатком словаря и правил — перезапуск воркера читает готовый pickle
+# вместо пересборки, а устаревший файл молча пересобирается.
+# ---------------------------------------------------------------------
+import hashlib
+import logging
+import os
+import pickle
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN, PREFIX, ANY = 0, 1, 2
+
+# Латиница, цифры и символы, которыми подменяют кириллические буквы
+_LOOKALIKES = {
+    "a": "а", "c": "с", "e": "е", "h": "н", "k": "к", "m": "м", "o": "о",
+    "p": "р", "t": "т", "x": "х", "y": "у", "u": "и", "i": "и",
+    "0": "о", "3": "з", "4": "ч", "6": "б", "@": "а",
+    "ё": "е", "і": "и", "ї": "и",
+}
+_LOOKALIKE_RE = re.compile("[" + re.escape("".join(_LOOKALIKES)) + "]")
+# Двойники подменяем только в словах с кириллицей: «кабель e6» — не «еб»
+_CYRILLIC_WORD_RE = re.compile(r"(?<!\S)[^\sа-яё]*[а-яё]\S*")
+_JOINERS = ("*", "-", "\u0301", "\u0300")  # выкидываются: «х*й», «х-у-й», ударения
+_NON_LETTERS_RE = re.compile(r"[^a-zа-я ]+")   # одиночные пробелы не трогаем — так быстрее
+_REPEATS_RE = re.compile(r"(.)\1+")
+_VALID_WORD_RE = re.compile(r"[а-яёa-z\-]+")   # слова, которые совпадали и в старой проверке
+
+MIN_TOKEN_LEN = 3  # короче — слишком много случайных совпадений («еп», «en»)
+
+# Корни, которые ищем не только как целое слово
+_ANY_STEMS = ("пизд", "залуп", "пидор", "пидр", "мудак", "мудил", "гандон", "шлюх", "хуйн")
+_PREFIX_STEMS = (
+    "бля", "еб", "хуй", "хуе", "хуя", "хуи", "хую", "сука", "суки", "сучк", "сучар",
+    "муда", "дроч", "говн", "жоп", "пидар",
+)
+# Начала «мирных» слов, в которых встречаются корни выше
+INNOCENT_STEMS = ("скипидар", "ебонит", "сучковат", "сучкоруб", "спидр", "бляха")
+
+# Самопроверка: первые должны находиться, вторые — нет
+SELF_CHECK_BAD = ("блять", "хуйня", "пиздец", "спиздил", "ебать", "заебал", "пидар", "пидарас",
+                  "ты пидор", "xyй", "пuздец", "бляяя", "х*у*й", "сука")
+SELF_CHECK_CLEAN = ("скипидар", "скипидаром", "ебонит", "ебонитовый", "сучковатый", "сучкоруб",
+                    "хлеб", "рубля", "гребля", "учебник", "оскорблять", "употреблять",
+                    "сукно", "мудрый", "потребление", "спидран", "спидраннер по доте",
+                    "бляха-муха", "кабель e6", "e6", "x3")
+_VERB_PREFIXES = ("", "на", "по", "за", "от", "отъ", "вы", "до", "у", "о", "об", "а",
+                  "при", "раз", "рас", "недо", "под", "въ", "съ")
+
+ARTIFACT_FORMAT = 2  # увеличить при изменении normalize() или устройства автомата
+
+
+def _unmask_word(m: "re.Match[str]") -> str:
+    """Двойники → кириллица внутри слова, где уже есть кириллица («пuздец», «6лять»)."""
+    return _LOOKALIKE_RE.sub(lambda c: _LOOKALIKES[c.group()], m.group())
+
+
+def normalize(text: str) -> str:
+    """Текст → слова из строчных букв через пробел, без повторов букв (и пробелов)."""
+    # str.translate на кириллице заметно медленнее: подменяем только то, что нашлось
+    text = text.lower()
+    if _LOOKALIKE_RE.search(text):
+        text = _CYRILLIC_WORD_RE.sub(_unmask_word, text)
+    for joiner in _JOINERS:
+        text = text.replace(joiner, "")
+    text = _NON_LETTERS_RE.sub(" ", text)
+    return _REPEATS_RE.sub(r"\1", text).strip()
+
+
+_INNOCENT_PREFIXES = tuple(normalize(stem) for stem in INNOCENT_STEMS)
+
+
+class ProfanityMatcher:
+    """
+    Автомат Ахо–Корасик по набору (шаблон, режим).
+    Состояние — три списка, поэтому объект легко сериализуется (pickle).
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[Tuple[Tuple[int, int], ...]] = [()]
+
+        raw_out: List[Dict[int, int]] = [{}]         # длина шаблона → самый мягкий режим
+        for word, mode in patterns:
+            if not word:
+                continue
+            node = 0
+            for ch in word:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    raw_out.append({})
+                node = nxt
+            raw_out[node][len(word)] = max(mode, raw_out[node].get(len(word), TOKEN))
+
+        # суффиксные ссылки обходом в ширину; выходы наследуются по ним
+        self.out = [tuple(o.items()) for o in raw_out]
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                if self.out[self.fail[child]]:
+                    self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "ProfanityMatcher":
+        """Словарь (как в Bad_Words_List.txt) + встроенные корни."""
+        patterns: Dict[str, int] = {}
+        for word in words:
+            if not _VALID_WORD_RE.fullmatch(word):    # «'употреблять'?», хэштеги и прочий мусор
+                continue
+            norm = normalize(word)
+            if len(norm) >= MIN_TOKEN_LEN and " " not in norm:
+                patterns.setdefault(norm, TOKEN)
+        for stem in _PREFIX_STEMS:
+            for prefix in _VERB_PREFIXES:
+                key = normalize(prefix + stem)
+                patterns[key] = max(patterns.get(key, TOKEN), PREFIX)
+        for stem in _ANY_STEMS:
+            patterns[normalize(stem)] = ANY
+        return cls(patterns.items())
+
+    def find(self, text: str) -> Optional[str]:
+        """Первое найденное «плохое» слово (в нормализованном виде) или None."""
+        return self.find_normalized(normalize(text))
+
+    def find_normalized(self, norm: str) -> Optional[str]:
+        """find() для текста, уже прошедшего normalize()."""
+        goto, fail, out = self.goto, self.fail, self.out
+        n = len(norm)
+        node = 0
+        for i, ch in enumerate(norm):
+            if ch == " ":                              # пробела нет ни в одном шаблоне
+                node = 0
+                continue
+            nxt = goto[node].get(ch)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto[node].get(ch)
+            node = nxt or 0
+            if not out[node]:
+                continue
+            for length, mode in out[node]:
+                start = i - length + 1
+                if mode != ANY:
+                    if start and norm[start - 1] != " ":
+                        continue                       # не начало слова
+                    if mode == TOKEN and i + 1 != n and norm[i + 1] != " ":
+                        continue                       # не целое слово
+                if norm.startswith(_INNOCENT_PREFIXES, norm.rfind(" ", 0, start) + 1):
+                    continue                           # «скипидар», «ебонит»
+                return norm[start:i + 1]
+        return None
+
+    def contains(self, text: str) -> bool:
+        return self.find(text) is not None
+
+
+# ---------------------------------------------------------------------
+# Сохранённый автомат
+# ---------------------------------------------------------------------
+
+
+def source_fingerprint(words_bytes: bytes) -> str:
+    """sha256 словаря + встроенных корней: меняется любое из них — артефакт устарел."""
+    digest = hashlib.sha256(words_bytes)
+    rules = (ARTIFACT_FORMAT, MIN_TOKEN_LEN, _LOOKALIKES, _ANY_STEMS, _PREFIX_STEMS, _VERB_PREFIXES)
+    digest.update(repr(rules).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _read_artifact(path: Path, fingerprint: str) -> Optional[ProfanityMatcher]:
+    try:
+        with path.open("rb") as f:
+            saved_fingerprint, state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:                          # битый или чужой файл — просто пересоберём
+        logger.warning(f"Не удалось прочитать {path.name}: {e}")
+        return None
+    if saved_fingerprint != fingerprint:
+        logger.info(f"{path.name} устарел, пересобираем автомат")
+        return None
+    matcher = ProfanityMatcher.__new__(ProfanityMatcher)
+    matcher.goto, matcher.fail, matcher.out = state
+    return matcher
+
+
+def _write_artifact(path: Path, fingerprint: str, matcher: ProfanityMatcher) -> None:
+    """Пишет во временный файл и подменяет атомарно: соседний процесс не прочтёт половину."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            pickle.dump((fingerprint, (matcher.goto, matcher.fail, matcher.out)), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:                            # read-only ФС и т.п.: работаем без кэша
+        logger.warning(f"Не удалось сохранить {path.name}: {e}")
+        tmp.unlink(missing_ok=True)
+
+
+def load_or_build(words_path: Path, artifact_path: Path) -> ProfanityMatcher:
+    """Автомат из artifact_path, если он собран из текущего словаря, иначе сборка и сохранение."""
+    words_bytes = words_path.read_bytes()
+    fingerprint = source_fingerprint(words_bytes)
+    matcher = _read_artifact(artifact_path, fingerprint)
+    if matcher is None:
+        words = (w.strip().lower() for w in words_bytes.decode("utf-8").splitlines())
+        matcher = ProfanityMatcher.from_words(w for w in words if w)
+        _write_artifact(artifact_path, fingerprint, matcher)
+    return matcher
+
+
+if __name__ == "__main__":
+    import sys
+    from source.bot_data import BAD_WORDS_FILE_PATH
+
+    lines = BAD_WORDS_FILE_PATH.read_text(encoding="utf-8").splitlines()
+    check = ProfanityMatcher.from_words(w.strip().lower() for w in lines if w.strip())
+    missed = [w for w in SELF_CHECK_BAD if not check.contains(w)]
+    flagged = [f"{w} ({check.find(w)})" for w in SELF_CHECK_CLEAN if check.contains(w)]
+    print(f"мат не найден: {', '.join(missed) or '—'}")
+    print(f"ложные срабатывания: {', '.join(flagged) or '—'}")
+    sys.exit(1 if missed or flagged else 0)
@@ -0,0 +1,104 @@
+# project_store.py - компактное хранилище проектов с целочисленными ID
+# ---------------------------------------------------------------------
+# Вместо списка dict-ов — объекты Project со __slots__ (нет словаря на
+# каждый проект), повторяющиеся строки направления/длительности
+# интернируются. ID проекта выводится из названия (crc32), поэтому не
+# меняется при перезагрузке базы, пока не поменялось название.
+# Индексы: ID → проект, название → проект, значение фасета → кортеж ID
+# (в порядке базы) — все выборки за O(1) без прохода по списку.
+# ---------------------------------------------------------------------
+import sys
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+FIELDS = ("title", "direction", "duration", "short_description", "full_description", "link_to_project")
+_ID_MASK = 0x7FFFFFFF          # неотрицательные 31-битные ID
+
+
+class Project:
+    """
+    Один проект. Поддерживает и p.title, и p["title"] / p.get("title"),
+    чтобы код, писавшийся под dict, работал без изменений.
+    """
+    __slots__ = ("id",) + FIELDS
+
+    def __init__(self, project_id: int, data: Dict[str, Any]):
+        self.id = project_id
+        self.title: str = data.get("title", "")
+        self.direction: str = sys.intern(data.get("direction") or "")
+        self.duration: str = sys.intern(data.get("duration") or "")
+        self.short_description: str = data.get("short_description", "")
+        self.full_description: str = data.get("full_description", "")
+        self.link_to_project: str = data.get("link_to_project", "")
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Project({self.id}, {self.title!r})"
+
+
+def stable_id(title: str, taken: Dict[int, Project]) -> int:
+    """crc32 названия; при коллизии — следующий свободный номер."""
+    project_id = zlib.crc32(title.encode("utf-8")) & _ID_MASK
+    while project_id in taken:
+        project_id = (project_id + 1) & _ID_MASK
+    return project_id
+
+
+class ProjectStore:
+    """Проекты одной версии базы + индексы по ID, названию и фасетам."""
+
+    def __init__(self, items: Iterable[Dict[str, Any]]):
+        self.by_id: Dict[int, Project] = {}
+        self.by_title: Dict[str, Project] = {}
+        projects: List[Project] = []
+        for data in items:
+            title = data.get("title", "")
+            if title in self.by_title:             # дубликат названия — берём первый, как парсер
+                continue
+            project = Project(stable_id(title, self.by_id), data)
+            self.by_id[project.id] = project
+            self.by_title[title] = project
+            projects.append(project)
+        self.projects: Tuple[Project, ...] = tuple(projects)
+
+        by_direction: Dict[str, List[int]] = {}
+        by_duration: Dict[str, List[int]] = {}
+        for project in projects:
+            by_direction.setdefault(project.direction, []).append(project.id)
+            by_duration.setdefault(project.duration, []).append(project.id)
+        self.by_direction: Dict[str, Tuple[int, ...]] = {k: tuple(v) for k, v in by_direction.items()}
+        self.by_duration: Dict[str, Tuple[int, ...]] = {k: tuple(v) for k, v in by_duration.items()}
+
+    def __len__(self) -> int:
+        return len(self.projects)
+
+    def get(self, project_id: int) -> Optional[Project]:
+        return self.by_id.get(project_id)
+
+    def find_by_title(self, title: str) -> Optional[Project]:
+        return self.by_title.get(title)
+
+    def filter(self, direction: Optional[str] = None, duration: Optional[str] = None) -> Tuple[Project, ...]:
+        """Проекты с заданным направлением и/или длительностью, в порядке базы."""
+        if not direction and not duration:
+            return self.projects
+        if direction and duration:
+            wanted = set(self.by_duration.get(duration, ()))
+            ids = [i for i in self.by_direction.get(direction, ()) if i in wanted]
+        elif direction:
+            ids = self.by_direction.get(direction, ())
+        else:
+            ids = self.by_duration.get(duration, ())
+        by_id = self.by_id
+        return tuple(by_id[i] for i in ids)
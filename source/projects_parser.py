@@ -1,10 +1,20 @@
 # projects_parser.py
 import requests
+import hashlib
 import json
 import logging
+import math
+import os
+import random
+import sys
 import re  # Работа с регулярными выражениями (для "чистки" текста от HTML-мусора)
 import html
-from source.config import API_URL_TEMPLATE
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+from requests.adapters import HTTPAdapter
+from source.config import API_URL_TEMPLATE, PARSER_CONCURRENCY, PARSER_CACHE_DIR
 from pathlib import Path
 
 logging.basicConfig(
@@ -13,7 +23,12 @@ logging.basicConfig(
     datefmt='%H:%M:%S'
 )
 
-MAX_SLICES = 3
+MAX_SLICES = 50          # предохранитель: реальное число страниц берём из total
+REQUEST_TIMEOUT = 15     # секунд на один запрос
+FETCH_RETRIES = 3        # попыток на страницу
+BACKOFF_BASE = 0.5       # пауза перед 2-й попыткой, дальше удваивается (с джиттером)
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
@@ -28,22 +43,183 @@ def clean_html(raw_html):
     return ' '.join(text.split())
 
 
-def fetch_data_from_slice(slice_number):
-    url = API_URL_TEMPLATE.format(slice_num=slice_number)
+def make_session(pool_size: int = PARSER_CONCURRENCY) -> requests.Session:
+    """Общая сессия: соединения с API Тильды переиспользуются всеми потоками (keep-alive)."""
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = "gzip, deflate"   # JSON каталога сжимается в разы
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HttpCache:
+    """
+    Дисковый кэш ответов для условных запросов. На каждый URL — тело
+    (<ключ>.body) и валидаторы ETag/Last-Modified (<ключ>.json). Ответ 304
+    означает «не изменилось» — тело берётся с диска. Ответы без валидаторов
+    не кэшируются. Счётчики — для итоговой строки в логе.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0               # 304, тело из кэша
+        self.misses = 0             # 200, тело скачано (и сохранено, если есть валидаторы)
+        self.uncacheable = 0        # из них — без ETag/Last-Modified
+        self.bytes_downloaded = 0   # по сети (после сжатия, если сервер сжал)
+        self.bytes_reused = 0       # взято с диска вместо скачивания
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since для URL, тело которого уже есть на диске."""
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if meta.get("url") != url or not body_path.exists():
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load(self, url: str) -> Optional[bytes]:
+        """Тело из кэша (после ответа 304) или None, если его уже нет."""
+        try:
+            body = self._paths(url)[1].read_bytes()
+        except OSError:
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_reused += len(body)
+        return body
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """Запоминает ответ 200 (если есть валидаторы) и учитывает скачанные байты."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        with self._lock:
+            self.misses += 1
+            self.bytes_downloaded += int(response.headers.get("Content-Length") or len(response.content))
+            if not etag and not last_modified:
+                self.uncacheable += 1
+                return
+        meta_path, body_path = self._paths(url)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified}
+        try:
+            write_atomic(body_path, response.content)         # сначала тело, потом валидаторы к нему
+            write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        except OSError as e:
+            logging.warning(f"Не удалось сохранить ответ в HTTP-кэш: {e}")
+
+    def summary(self) -> str:
+        return (f"HTTP-кэш: из кэша (304) {self.hits}, скачано (200) {self.misses}"
+                f" (без ETag/Last-Modified {self.uncacheable}), по сети {self.bytes_downloaded / 1024:.1f} КБ,"
+                f" с диска {self.bytes_reused / 1024:.1f} КБ")
+
+
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+def fetch_data_from_slice(slice_number,
+                          session: Optional[requests.Session] = None,
+                          url_template: str = API_URL_TEMPLATE,
+                          retries: int = FETCH_RETRIES,
+                          cache: Optional[HttpCache] = None):
+    """
+    JSON страницы slice_number или None. Таймауты, обрывы и 5xx/429 повторяются с паузой.
+    С cache запрос условный: на 304 тело берётся с диска.
+    """
+    url = url_template.format(slice_num=slice_number)
+    http = session or requests
     logging.info(f"Запрос данных со страницы {slice_number}: {url}")
+    for attempt in range(1, retries + 1):
+        try:
+            headers = cache.conditional_headers(url) if cache else {}
+            response = http.get(url, timeout=REQUEST_TIMEOUT, headers=headers)
+            if response.status_code == 304 and cache:
+                body = cache.load(url)
+                if body is not None:
+                    return json.loads(body)
+                problem = "304, но тела нет в кэше"          # следующая попытка — без валидаторов
+            elif response.status_code in RETRY_STATUSES:
+                problem = f"HTTP {response.status_code}"
+            else:
+                response.raise_for_status()
+                data = response.json()
+                if cache:
+                    cache.store(url, response)
+                return data
+        except requests.exceptions.Timeout:
+            problem = "таймаут"
+        except requests.exceptions.ConnectionError as e:
+            problem = f"ошибка соединения: {e}"
+        except json.JSONDecodeError as e:      # requests.JSONDecodeError — его наследник
+            problem = f"ошибка декодирования JSON: {e}. Ответ: {response.text[:200]}"
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Ошибка при запросе к API ({type(e).__name__}) для slice {slice_number}: {e}")
+            return None
+        if attempt < retries:
+            delay = _backoff(attempt)
+            logging.warning(f"Slice {slice_number}: {problem}, попытка {attempt}/{retries}, повтор через {delay:.1f} с")
+            time.sleep(delay)
+        else:
+            logging.error(f"Slice {slice_number}: {problem}, попытки исчерпаны")
+    return None
+
+
+def fetch_all_slices(session: requests.Session,
+                     url_template: str = API_URL_TEMPLATE,
+                     concurrency: int = PARSER_CONCURRENCY,
+                     cache: Optional[HttpCache] = None) -> Dict[int, dict]:
+    """
+    Скачивает все страницы каталога: {номер slice: JSON}.
+    Первая страница даёт total и размер страницы — остальные качаются разом.
+    Если total нет или его не добрали, страницы запрашиваются окнами по
+    concurrency штук, пока не придёт пустая (или MAX_SLICES).
+    """
+    first = fetch_data_from_slice(1, session, url_template, cache=cache)
+    if not first:
+        return {}
+    pages = {1: first}
+    per_slice = len(first.get("products") or [])
+    total = first.get("total")
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.Timeout:
-        logging.error(f"Таймаут при запросе к API для slice {slice_number}")
-        return None
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Ошибка при запросе к API ({type(e).__name__}) для slice {slice_number}: {e}")
-        return None
-    except json.JSONDecodeError as e:
-        logging.error(f"Ошибка декодирования JSON от API для slice {slice_number}: {e}. Ответ: {response.text[:200]}")
-        return None
+        total = int(total) if total is not None else None
+    except (TypeError, ValueError):
+        total = None
+    if not per_slice:
+        return pages
+
+    fetched = per_slice
+    if total:
+        batch = range(2, min(math.ceil(total / per_slice), MAX_SLICES) + 1)
+    else:
+        batch = range(2, min(2 + concurrency, MAX_SLICES + 1))
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="tilda") as pool:
+        while batch:
+            results = pool.map(lambda n: fetch_data_from_slice(n, session, url_template, cache=cache), batch)
+            for slice_number, data in zip(batch, results):
+                pages[slice_number] = data
+                fetched += len((data or {}).get("products") or [])
+            last = pages[batch[-1]]
+            if not last or not last.get("products") or (total and fetched >= total):
+                break
+            nxt = batch[-1] + 1
+            if nxt > MAX_SLICES:
+                logging.warning(f"Достигнут предел MAX_SLICES={MAX_SLICES}, остальные страницы не запрошены.")
+                break
+            batch = range(nxt, min(nxt + concurrency, MAX_SLICES + 1))
+    return pages
 
 
 def extract_project_info(product_data):
@@ -114,21 +290,98 @@ def extract_filter_options(api_filters_data):
     return available_filters
 
 
-def parse_and_save_data():
-    """Основная функция парсера: получает данные, обрабатывает и сохраняет."""
+class ProjectsDiff(NamedTuple):
+    """Чем новый список проектов отличается от сохранённого (по названиям)."""
+    added: List[str]
+    removed: List[str]
+    changed: List[str]
+
+
+def project_hash(project: Dict[str, Any]) -> str:
+    """Хэш содержимого проекта: не зависит от порядка ключей."""
+    data = json.dumps(project, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def diff_projects(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> ProjectsDiff:
+    old_hashes = {p["title"]: project_hash(p) for p in old}
+    new_hashes = {p["title"]: project_hash(p) for p in new}
+    return ProjectsDiff(
+        added=[t for t in new_hashes if t not in old_hashes],
+        removed=[t for t in old_hashes if t not in new_hashes],
+        changed=[t for t, h in new_hashes.items() if t in old_hashes and old_hashes[t] != h],
+    )
+
+
+def _log_diff(diff: ProjectsDiff) -> None:
+    logging.info(f"Изменения проектов: добавлено {len(diff.added)}, удалено {len(diff.removed)}, "
+                 f"изменено {len(diff.changed)}")
+    for label, titles in (("+", diff.added), ("-", diff.removed), ("~", diff.changed)):
+        for title in titles:
+            logging.info(f"  {label} {title}")
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Временный файл рядом + os.replace: читатель видит либо старый файл, либо новый целиком."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _read_previous(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def parse_and_save_data(url_template: str = API_URL_TEMPLATE,
+                        output_file: Path = KNOWLEDGE_BASE_FILE,
+                        concurrency: int = PARSER_CONCURRENCY,
+                        cache_dir: Optional[Path] = Path(PARSER_CACHE_DIR) if PARSER_CACHE_DIR else None):
+    """
+    Основная функция парсера: получает данные, обрабатывает и сохраняет.
+    Страницы запрашиваются условно (HTTP-кэш в cache_dir, None — без кэша).
+    Файл перезаписывается (атомарно) только если содержимое изменилось и
+    каталог собран целиком: если какая-то страница не загрузилась после
+    повторов или проектов пришло меньше total, прежний файл остаётся —
+    иначе горячая перезагрузка убрала бы недокачанные проекты из бота.
+    Возвращает ProjectsDiff относительно прежнего файла или None, если
+    собрать данные не удалось.
+    """
     logging.info("Запуск парсера VK Education Projects...")
     all_projects = []
+    seen_titles = set()
     parsed_filter_options = {"directions": [], "durations": []}
     got_filters = False
-    for i in range(1, MAX_SLICES + 1):
-        raw_page_data = fetch_data_from_slice(i)
+    failed_slices = []
+    received = 0                 # проектов в ответах API, до отсева повторов по названию
+    cache = HttpCache(cache_dir) if cache_dir else None
+    with make_session(concurrency) as session:
+        pages = fetch_all_slices(session, url_template, concurrency, cache)
+    if cache:
+        logging.info(cache.summary())
+    total_api = None
+    for i in sorted(pages):
+        raw_page_data = pages[i]
         if not raw_page_data:
-            logging.warning(f"Не удалось получить данные со страницы {i}. Пропускаем.")
+            logging.error(f"Не удалось получить данные со страницы {i}.")
+            failed_slices.append(i)
             continue
         if raw_page_data.get("status") == "ERROR":
             logging.error(
                 f"API Тильды вернуло ошибку для страницы {i}: {raw_page_data.get('message', 'Нет сообщения об ошибке')}")
+            failed_slices.append(i)
             continue
+        if total_api is None:
+            total_api = raw_page_data.get('total')
         if not got_filters and "filters" in raw_page_data:
             parsed_filter_options = extract_filter_options(raw_page_data.get("filters"))
             if parsed_filter_options["directions"] or parsed_filter_options["durations"]:
@@ -138,37 +391,53 @@ def parse_and_save_data():
         products_on_page = raw_page_data.get('products', [])
         if not products_on_page:
             logging.info(f"На странице {i} не найдено проектов (поле 'products' пустое или отсутствует).")
-            total_api = raw_page_data.get('total')
-            if total_api is not None and len(all_projects) >= total_api:
-                logging.info(f"Собрано {len(all_projects)} проектов, что соответствует total={total_api}. Завершаем сбор проектов.")
-                break
             continue
         logging.info(f"Обработка {len(products_on_page)} проектов со страницы {i}...")
+        received += len(products_on_page)
         for product_data in products_on_page:
             project_info = extract_project_info(product_data)
-            if any(p["title"] == project_info["title"] for p in all_projects):
+            if project_info["title"] in seen_titles:
                 continue
+            seen_titles.add(project_info["title"])
             all_projects.append(project_info)
         logging.info(f"Страница {i} обработана. Всего собрано проектов: {len(all_projects)}")
-    if raw_page_data and raw_page_data.get('total') is not None:
-        api_total_projects = raw_page_data.get('total')
-        if len(all_projects) != api_total_projects:
-            logging.warning(
-                f"Собрано {len(all_projects)} проектов, но API сообщает о {api_total_projects} всего. Возможно, MAX_SLICES ({MAX_SLICES}) неверно или есть проблемы с API.")
-    elif not all_projects:
+    if not all_projects:
         logging.error("Не удалось собрать ни одного проекта. Проверьте URL API и доступность сайта.")
-        return
+        return None
+    if failed_slices:
+        logging.error(f"Страницы {', '.join(map(str, failed_slices))} не загрузились, "
+                      f"{output_file.name} оставляем прежним.")
+        return None
+    if total_api is not None and received < int(total_api):
+        logging.error(f"Получено {received} проектов, но API сообщает о {total_api} всего — "
+                      f"{output_file.name} оставляем прежним.")
+        return None
+    if total_api is not None and received != int(total_api):
+        logging.warning(f"Получено {received} проектов, а API сообщает о {total_api} всего.")
     knowledge_base_content = {
         "available_projects": all_projects,
         "available_filters": parsed_filter_options
     }
+    new_bytes = json.dumps(knowledge_base_content, ensure_ascii=False, indent=4).encode("utf-8")
+    old_bytes = _read_previous(output_file)
+    old_projects: List[Dict[str, Any]] = []
+    if old_bytes:
+        try:
+            old_projects = json.loads(old_bytes).get("available_projects", [])
+        except (ValueError, AttributeError) as e:
+            logging.warning(f"Прежний {output_file.name} не читается ({e}), перезапишем целиком.")
+    diff = diff_projects(old_projects, all_projects)
+    _log_diff(diff)
+    if new_bytes == old_bytes:
+        logging.info(f"Данные не изменились, {output_file} не перезаписываем.")
+        return diff
     try:
-        with open(KNOWLEDGE_BASE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(knowledge_base_content, f, ensure_ascii=False, indent=4)
-        logging.info(f"Данные успешно сохранены в {KNOWLEDGE_BASE_FILE}. Всего проектов: {len(all_projects)}.")
+        write_atomic(output_file, new_bytes)
+        logging.info(f"Данные успешно сохранены в {output_file}. Всего проектов: {len(all_projects)}.")
     except IOError as e:
-        logging.error(f"Ошибка записи в файл {KNOWLEDGE_BASE_FILE}: {e}")
+        logging.error(f"Ошибка записи в файл {output_file}: {e}")
+    return diff
 
 
 if __name__ == '__main__':
-    parse_and_save_data()
\ No newline at end of file
+    sys.exit(0 if parse_and_save_data() is not None else 1)
\ No newline at end of file
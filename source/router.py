@@ -0,0 +1,147 @@
+# router.py - таблица команд кнопок и схемы их payload-ов
+# ---------------------------------------------------------------------
+# Каждая команда регистрируется декоратором вместе со схемой полей data:
+#
+#     @COMMANDS.route("faq_page", page=Field(int, default=0, minimum=0))
+#     def _faq_page(snap, depth, data): ...
+#
+# CommandRouter.dispatch():
+#   • находит обработчик по cmd одним поиском в словаре (вместо цепочки if);
+#   • один раз приводит depth и поля data к типам схемы (строка "2" → 2),
+#     подставляет значения по умолчанию и отбрасывает лишние поля;
+#   • payload, не прошедший схему (page="abc", id=-1, data — не объект),
+#     получает ответ on_invalid без исключения; то же, если обработчик
+#     сам бросил PayloadError (id, которого нет в текущих данных);
+#     неизвестная команда — ответ on_unknown;
+#     числа в строках принимаются только вида -?[0-9]{1,9};
+#   • пишет время в COMMAND_SECONDS и ошибки (unknown/invalid/exception)
+#     в COMMAND_ERRORS — по метке команды.
+# python -m source.router — самопроверка Field.coerce на SELF_CHECK_INVALID.
+# ---------------------------------------------------------------------
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from source.metrics import COMMAND_ERRORS, COMMAND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+Reply = Tuple[str, Optional[str]]
+
+_INT_RE = re.compile(r"-?[0-9]{1,9}")   # только ASCII-цифры: «²», «--1» и числа-простыни — не числа
+
+
+class PayloadError(ValueError):
+    """Поле payload-а не подходит под схему команды."""
+
+
+class Field(NamedTuple):
+    type: type                      # int или str
+    default: Any = None
+    minimum: Optional[int] = None   # для int: меньшие значения — ошибка
+
+    def coerce(self, name: str, value: Any) -> Any:
+        if value is None:
+            return self.default
+        if self.type is int:
+            if isinstance(value, bool):
+                raise PayloadError(f"{name}: ожидалось число, получено {value!r:.40}")
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            elif isinstance(value, str) and _INT_RE.fullmatch(value.strip()):
+                value = int(value)
+            if not isinstance(value, int):
+                raise PayloadError(f"{name}: ожидалось число, получено {value!r:.40}")
+            if self.minimum is not None and value < self.minimum:
+                raise PayloadError(f"{name}: {value} меньше {self.minimum}")
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if not isinstance(value, str):
+            raise PayloadError(f"{name}: ожидалась строка, получено {value!r}")
+        return value
+
+
+DEPTH = Field(int, default=0, minimum=0)
+
+# Самопроверка: ни одно из значений не должно пройти как число
+SELF_CHECK_INVALID = ("²", "--1", "-", "", " ", "1.5", "١", "9" * 5000, "1e3", True, [1], 1.5)
+
+
+class Route(NamedTuple):
+    handler: Callable[[Any, int, Dict[str, Any]], Reply]
+    schema: Dict[str, Field]
+
+
+class CommandRouter:
+    """
+    Реестр cmd → (обработчик, схема). Обработчик вызывается как
+    handler(snap, depth, data), где в data есть все поля схемы.
+    prepare(data, snap) — необязательный шаг до проверки схемы (например,
+    раскрытие ID направлений в текст по снимку данных).
+    """
+
+    def __init__(self,
+                 on_unknown: Callable[[Any], Reply],
+                 on_invalid: Callable[[Any], Reply],
+                 prepare: Optional[Callable[[Dict[str, Any], Any], Dict[str, Any]]] = None):
+        self.routes: Dict[str, Route] = {}
+        self.on_unknown = on_unknown
+        self.on_invalid = on_invalid
+        self.prepare = prepare
+
+    def route(self, cmd: str, **schema: Field):
+        """Декоратор: регистрирует обработчик команды cmd со схемой полей data."""
+        def register(handler):
+            if cmd in self.routes:
+                raise ValueError(f"Команда {cmd} уже зарегистрирована")
+            self.routes[cmd] = Route(handler, schema)
+            return handler
+        return register
+
+    def parse(self, route: Route, payload: dict, snap: Any) -> Tuple[int, Dict[str, Any]]:
+        """payload → (depth, data) по схеме команды; PayloadError — если не подходит."""
+        raw = payload.get("data") or {}
+        if not isinstance(raw, dict):
+            raise PayloadError(f"data: ожидался объект, получено {raw!r}")
+        if self.prepare is not None:
+            raw = self.prepare(raw, snap)
+        depth = DEPTH.coerce("depth", payload.get("depth"))
+        return depth, {name: field.coerce(name, raw.get(name)) for name, field in route.schema.items()}
+
+    def dispatch(self, payload: dict, snap: Any) -> Reply:
+        """Ответ на нажатие кнопки; исключения обработчика пробрасываются дальше."""
+        started = time.perf_counter()
+        cmd = payload.get("cmd")
+        route = self.routes.get(cmd) if isinstance(cmd, str) else None
+        label = cmd if route is not None else "other"   # чужие cmd сводим в "other", чтобы не плодить метки
+        try:
+            if route is None:
+                COMMAND_ERRORS.inc(label, "unknown")
+                return self.on_unknown(snap)
+            try:
+                depth, data = self.parse(route, payload, snap)
+                return route.handler(snap, depth, data)
+            except PayloadError as e:                   # в т.ч. из обработчика: id вне данных снимка
+                COMMAND_ERRORS.inc(label, "invalid")
+                logger.warning("Payload команды %s не прошёл проверку: %s", cmd, e)
+                return self.on_invalid(snap)
+            except Exception:
+                COMMAND_ERRORS.inc(label, "exception")
+                raise
+        finally:
+            COMMAND_SECONDS.observe(time.perf_counter() - started, label)
+
+
+if __name__ == "__main__":
+    import sys
+
+    passed = []
+    for value in SELF_CHECK_INVALID:
+        try:
+            passed.append(f"{value!r:.20} → {Field(int).coerce('value', value)!r:.20}")
+        except PayloadError:
+            pass
+    print(f"приняты как число: {', '.join(passed) or '—'}")
+    sys.exit(1 if passed else 0)
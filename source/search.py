@@ -0,0 +1,118 @@
+# search.py - полнотекстовый поиск проектов (инвертированный индекс + BM25)
+# ---------------------------------------------------------------------
+# Индекс строится один раз на версию knowledge_base.json:
+#   термин → {номер проекта: взвешенная частота}.
+# Поля весят по-разному: название > направление > описания.
+# Термины — нормализованные токены с грубым отсечением русских окончаний,
+# а короткий запрос «игр» находит и «игры», и «игровой» через префиксный
+# поиск по отсортированному словарю.
+# ---------------------------------------------------------------------
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+_TOKEN_RE = re.compile(r"[0-9a-zа-яё]+")
+
+_STOP_WORDS = frozenset({
+    "и", "в", "во", "на", "по", "с", "со", "к", "ко", "о", "об", "от", "до", "из", "за",
+    "для", "при", "про", "не", "а", "но", "или", "что", "как", "это", "то", "же", "ли",
+    "бы", "у", "я", "мы", "вы", "ты", "он", "она", "они", "мне", "есть", "какие", "какой",
+    "the", "a", "an", "of", "and", "or", "to", "in", "for",
+})
+
+# окончания, которые отрезаем (длинные проверяются первыми)
+_ENDINGS = tuple(sorted({
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ая", "яя", "ое", "ее",
+    "ые", "ие", "ый", "ий", "ой", "ей", "ую", "юю", "ых", "их", "ов", "ев", "ам", "ям",
+    "ах", "ях", "ом", "ем", "ия", "ие", "ию", "ии", "ы", "и", "а", "я", "о", "е", "у", "ю", "ь",
+}, key=len, reverse=True))
+_MIN_STEM = 3
+_MIN_PREFIX = 3            # с какой длины термин запроса раскрываем по префиксу
+_MAX_EXPANSIONS = 20       # сколько терминов словаря берём на один префикс
+_PREFIX_PENALTY = 0.8      # совпадение по префиксу чуть слабее точного
+
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "direction": 2.0,
+    "short_description": 1.0,
+    "full_description": 1.0,
+}
+
+
+def stem(token: str) -> str:
+    """Отрезает типичное окончание, оставляя не меньше _MIN_STEM букв."""
+    for ending in _ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= _MIN_STEM:
+            return token[:-len(ending)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Текст → список терминов индекса (без стоп-слов и односимвольных токенов)."""
+    tokens = _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+    return [stem(t) for t in tokens if len(t) > 1 and t not in _STOP_WORDS]
+
+
+class ProjectSearchIndex:
+    """
+    Инвертированный индекс по проектам. search() возвращает проекты,
+    отсортированные по убыванию BM25 (при равенстве — в порядке базы).
+    """
+
+    def __init__(self, projects: List[Dict[str, Any]], k1: float = 1.2, b: float = 0.75):
+        self.projects = projects
+        self.k1 = k1
+        self.b = b
+
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.doc_len: List[float] = []
+        for doc_id, project in enumerate(projects):
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(str(project.get(field) or "")):
+                    postings[term][doc_id] = postings[term].get(doc_id, 0.0) + weight
+                    length += weight
+            self.doc_len.append(length)
+
+        self.postings = dict(postings)
+        self.vocab = sorted(self.postings)           # для префиксного поиска через bisect
+        n = len(projects)
+        self.avg_len = (sum(self.doc_len) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Термин запроса → {термин словаря: множитель}."""
+        found = {term: 1.0} if term in self.postings else {}
+        if len(term) >= _MIN_PREFIX:
+            i = bisect_left(self.vocab, term)
+            while i < len(self.vocab) and len(found) < _MAX_EXPANSIONS and self.vocab[i].startswith(term):
+                found.setdefault(self.vocab[i], _PREFIX_PENALTY)
+                i += 1
+        return found
+
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """До `limit` проектов, лучше всего подходящих под запрос."""
+        return self.search_terms(tokenize(text), limit)
+
+    def search_terms(self, terms: Iterable[str], limit: int = 20) -> List[Dict[str, Any]]:
+        """search() для уже готовых терминов запроса."""
+        scores: Dict[int, float] = defaultdict(float)
+        for query_term in set(terms):
+            best: Dict[int, float] = {}              # лучший вклад термина в каждый документ
+            for term, factor in self._expand(query_term).items():
+                idf = self.idf[term]
+                for doc_id, tf in self.postings[term].items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / self.avg_len)
+                    score = factor * idf * tf * (self.k1 + 1) / (tf + norm)
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] += score
+
+        ranked = sorted(scores, key=lambda d: (-scores[d], d))[:limit]
+        return [self.projects[d] for d in ranked]
@@ -0,0 +1,177 @@
+# sender.py - пакетная отправка ответов через метод execute
+# ---------------------------------------------------------------------
+# VK ограничивает токен сообщества ~20 запросами в секунду. Вместо
+# отдельного HTTP-запроса на каждый ответ BatchSender собирает до 25 вызовов
+# messages.send в один execute и выпускает запросы не чаще `rate` в секунду
+# (скользящее окно, как считает сам VK).
+#   • submit(params) сразу возвращает Future с message_id или ApiError
+#     именно этого сообщения (execute возвращает false + execute_errors);
+#   • пачки уходят по одной в порядке поступления, поэтому ответы одному
+#     пользователю не перемешиваются.
+# ---------------------------------------------------------------------
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Tuple
+
+from vk_api.exceptions import ApiError
+
+from source.config import SEND_RPS
+from source.metrics import VK_API_ERRORS
+from source.vk_http import VkHttpClient
+
+logger = logging.getLogger(__name__)
+
+EXECUTE_MAX_CALLS = 25          # лимит VK на число вызовов API внутри одного execute
+RETRY_ERROR_CODES = {6, 10}     # «слишком много запросов в секунду», внутренняя ошибка VK
+MAX_ATTEMPTS = 3
+RATE_WINDOW_MARGIN = 0.05       # сек к окну: запрос доходит до VK позже, чем мы его отметили
+
+
+class RateLimiter:
+    """
+    Потокобезопасное скользящее окно: в любом отрезке длиной в секунду
+    (плюс небольшой запас) не больше limit запросов — так же считает VK.
+    У token bucket с запасом в `rate` токенов полный запас и пополнение
+    вместе давали ~2·rate запросов за секунду.
+    Дробный rate округляется вниз (6.7 → 6 в секунду), rate < 1 —
+    один запрос за 1/rate секунд.
+    """
+
+    def __init__(self, rate: float):
+        self.limit = max(1, int(rate))
+        self.window = (max(1.0, 1 / rate) if rate > 0 else 1.0) + RATE_WINDOW_MARGIN
+        self._sent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Занимает место в окне, при необходимости ждёт, пока самый старый запрос из него выйдет."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.window:
+                    self._sent.popleft()
+                if len(self._sent) < self.limit:
+                    self._sent.append(now)
+                    return
+                delay = self._sent[0] + self.window - now
+            time.sleep(delay)
+
+
+def build_execute_code(calls: List[Dict[str, Any]]) -> str:
+    """VKScript, который выполняет messages.send для каждого набора параметров."""
+    body = ",".join(
+        f"API.messages.send({json.dumps(params, ensure_ascii=False)})" for params in calls
+    )
+    return f"return [{body}];"
+
+
+class BatchSender:
+    """
+    Фоновый поток, отправляющий messages.send пачками через execute.
+    max_delay — сколько ждать добора пачки после первого сообщения.
+    """
+
+    def __init__(self,
+                 client: VkHttpClient,
+                 rate: float = SEND_RPS,
+                 batch_size: int = EXECUTE_MAX_CALLS,
+                 max_delay: float = 0.05):
+        self.client = client
+        self.limiter = RateLimiter(rate)
+        self.batch_size = max(1, min(batch_size, EXECUTE_MAX_CALLS))
+        self.max_delay = max_delay
+
+        self._pending: Deque[Tuple[Dict[str, Any], Future]] = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="vk-sender", daemon=True)
+
+    def start(self) -> "BatchSender":
+        self._thread.start()
+        return self
+
+    def submit(self, params: Dict[str, Any]) -> Future:
+        """Ставит сообщение в очередь отправки."""
+        future: Future = Future()
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("BatchSender остановлен")
+            self._pending.append((params, future))
+            self._cond.notify()
+        return future
+
+    def qsize(self) -> int:
+        """Сколько сообщений ждут отправки."""
+        return len(self._pending)
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Отправляет всё, что уже в очереди, и останавливает поток."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    # -----------------------------------------------------------------
+    # Фоновый поток
+    # -----------------------------------------------------------------
+
+    def _next_batch(self) -> List[Tuple[Dict[str, Any], Future]]:
+        with self._cond:
+            while not self._pending and not self._stopping:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_delay
+            while len(self._pending) < self.batch_size and not self._stopping:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            count = min(len(self._pending), self.batch_size)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:                                  # пусто и stop() → выходим
+                return
+            self._send_batch(batch)
+
+    def _send_batch(self, batch: List[Tuple[Dict[str, Any], Future]]) -> None:
+        calls = [params for params, _ in batch]
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.limiter.acquire()
+            try:
+                response = self.client.method(
+                    "execute", {"code": build_execute_code(calls)}, raw=True
+                )
+                break
+            except ApiError as e:
+                if e.code in RETRY_ERROR_CODES and attempt < MAX_ATTEMPTS:
+                    logger.warning("execute: %s, повтор %s/%s", e, attempt, MAX_ATTEMPTS - 1)
+                    time.sleep(0.5 * attempt)
+                    continue
+                self._fail_all(batch, e)
+                return
+            except Exception as e:
+                self._fail_all(batch, e)
+                return
+
+        results = list(response.get("response") or [])
+        results += [False] * (len(batch) - len(results))
+        errors = iter(response.get("execute_errors") or [])
+        for (params, future), result in zip(batch, results):
+            if result is False:                            # ошибки идут по порядку неудачных вызовов
+                error = next(errors, {"error_code": 0, "error_msg": "unknown execute error"})
+                VK_API_ERRORS.inc("messages.send", str(error.get("error_code")))
+                future.set_exception(ApiError(self.client, "messages.send", params, False, error))
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _fail_all(batch: List[Tuple[Dict[str, Any], Future]], error: Exception) -> None:
+        logger.error("Не удалось отправить пачку из %s сообщений: %s", len(batch), error)
+        for _, future in batch:
+            future.set_exception(error)
@@ -0,0 +1,68 @@
+# vk_http.py - лёгкий HTTP-клиент VK API поверх одного пула соединений
+# ---------------------------------------------------------------------
+# vk_api.VkApi.method держит глобальный lock и ограничение 3 запроса/с,
+# поэтому параллельные messages.send через него невозможны. Здесь — тот же
+# контракт method(name, values), но без lock-а и с настраиваемым адресом API
+# (например, локальный фейковый сервер из source/fake_vk.py).
+# ---------------------------------------------------------------------
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from vk_api.exceptions import ApiError        # то же исключение, что и у vk_api
+
+from source.config import VK_API_URL, VK_API_VERSION, SEND_CONCURRENCY
+from source.metrics import VK_REQUEST_SECONDS, VK_API_ERRORS
+
+
+class VkHttpClient:
+    """
+    Вызов методов VK API через общий requests.Session.
+    Объект можно передавать в VkBotLongPoll вместо vk_api.VkApi.
+    """
+
+    def __init__(self,
+                 token: str,
+                 api_url: str = VK_API_URL,
+                 api_version: str = VK_API_VERSION,
+                 pool_size: int = SEND_CONCURRENCY,
+                 timeout: float = 10.0):
+        self.token = token
+        self.api_url = api_url if api_url.endswith("/") else api_url + "/"
+        self.api_version = api_version
+        self.timeout = timeout
+
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+
+    def method(self,
+               method: str,
+               values: Optional[Dict[str, Any]] = None,
+               raw: bool = False) -> Any:
+        """
+        Вызывает метод API. При raw=False возвращает response['response'],
+        при raw=True — весь ответ (нужно для execute_errors).
+        Ошибку API поднимает как vk_api.exceptions.ApiError.
+        """
+        values = dict(values) if values else {}
+        values.setdefault("v", self.api_version)
+        values.setdefault("access_token", self.token)
+
+        started = time.perf_counter()
+        try:
+            response = self.http.post(self.api_url + method, data=values, timeout=self.timeout)
+            response.raise_for_status()
+            body = response.json()
+        finally:
+            VK_REQUEST_SECONDS.observe(time.perf_counter() - started, method)
+
+        if "error" in body:
+            VK_API_ERRORS.inc(method, str(body["error"].get("error_code")))
+            raise ApiError(self, method, values, raw, body["error"])
+        return body if raw else body["response"]
+
+    def close(self) -> None:
+        self.http.close()
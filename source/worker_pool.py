@@ -0,0 +1,87 @@
+# worker_pool.py - ограниченная очередь + пул потоков-обработчиков
+# ---------------------------------------------------------------------
+# Приём событий (longpoll) и их обработка разнесены: приём только кладёт
+# событие в очередь, потоки-воркеры вызывают бизнес-логику и отправку.
+#   • у каждого воркера своя ограниченная очередь;
+#   • очередь выбирается по ключу (user_id) → клики одного пользователя
+#     обрабатываются строго по порядку одним и тем же воркером;
+#   • если очередь заполнена, submit() блокируется — это backpressure:
+#     новые события остаются в longpoll VK, а не копятся в памяти.
+# ---------------------------------------------------------------------
+import logging
+import queue
+import threading
+from typing import Any, Callable, List
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # маркер завершения для воркера
+
+
+class ShardedWorkerPool:
+    """
+    Пул из `workers` потоков. handler(item) вызывается в потоке воркера,
+    исключения логируются и не останавливают поток.
+    """
+
+    def __init__(self,
+                 handler: Callable[[Any], None],
+                 workers: int = 8,
+                 queue_size: int = 256,
+                 name: str = "bot-worker"):
+        self.handler = handler
+        self.workers = max(workers, 1)
+        per_worker = max(queue_size // self.workers, 1)   # общий лимит делим между воркерами
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._work, args=(q,), name=f"{name}-{i}", daemon=True)
+            for i, q in enumerate(self._queues)
+        ]
+        self._started = False
+        self._saturated = False
+
+    def start(self) -> "ShardedWorkerPool":
+        if not self._started:
+            for t in self._threads:
+                t.start()
+            self._started = True
+        return self
+
+    def submit(self, key: int, item: Any) -> None:
+        """
+        Ставит item в очередь воркера, отвечающего за key.
+        Блокируется, пока в этой очереди не появится место.
+        """
+        q = self._queues[hash(key) % self.workers]
+        try:
+            q.put_nowait(item)
+            self._saturated = False
+        except queue.Full:
+            if not self._saturated:                       # пишем один раз на эпизод перегрузки
+                logger.warning("Очередь обработки переполнена (%s событий), ждём воркер…", q.maxsize)
+                self._saturated = True
+            q.put(item)
+
+    def qsize(self) -> int:
+        """Сколько событий сейчас ждут обработки (приблизительно)."""
+        return sum(q.qsize() for q in self._queues)
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Дожидается обработки уже принятых событий и останавливает воркеры."""
+        if not self._started:
+            return
+        for q in self._queues:
+            q.put(_STOP)
+        for t in self._threads:
+            t.join(timeout)
+        self._started = False
+
+    def _work(self, q: queue.Queue) -> None:
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            try:
+                self.handler(item)
+            except Exception as e:
+                logger.exception("Ошибка в воркере при обработке события: %s", e)